@@ -0,0 +1,212 @@
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_upstream import COUNTRIES, SERVICES, parse_service_latency, start_mock_upstream
+
+# Benchmarks for the Travel & Weather Advisor, run against the deterministic local mock upstream
+# so results only depend on the code and the injected latency/error settings.
+#
+#   python benchmark.py --latency 0.05 --error-rate 0.01 --output bench.json
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+COUNTRY_NAMES = [country["name"]["common"] for country in COUNTRIES]
+
+# Function to summarize a list of durations (seconds) as milliseconds
+def summarize(durations):
+    ordered = sorted(durations)
+
+    def percentile(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+# Function to time `function` once per iteration, calling `before` untimed ahead of each run
+def measure(function, iterations, before=None):
+    durations = []
+    for i in range(iterations):
+        if before:
+            before()
+        started = time.perf_counter()
+        function(i)
+        durations.append(time.perf_counter() - started)
+    return summarize(durations)
+
+# Function to forget everything the advisor cached, so the next lookup goes upstream again
+def reset_caches(main):
+    main.response_cache.clear()
+    main.holiday_index = main.HolidayIndex()
+    # Reset in place: a new store would start another refresher thread on every cold iteration
+    main.advisory_store.reset()
+
+# Function to run one end-to-end lookup the way batch mode does
+def lookup(main, name):
+    return main.run_batch_query(1, name)
+
+# Function to time interpreter start plus importing main, in fresh processes
+def measure_startup(iterations, environment):
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import main"], cwd=PROJECT_DIR, env=environment, check=True)
+        durations.append(time.perf_counter() - started)
+    return summarize(durations)
+
+# Import-time budget for `import main` (cumulative microseconds from -X importtime), and modules
+# that must not be imported by it because only the interactive menu or network calls need them
+IMPORT_BUDGET_US = 60000
+IMPORT_FORBIDDEN = ("rich", "requests", "urllib3", "asyncio")
+
+# Function to import main in a fresh process with -X importtime, returns {module: cumulative µs}
+def measure_import_time(environment):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=PROJECT_DIR,
+                            env=environment, check=True, capture_output=True, text=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+# Function to check `import main` against the budget, returns a list of problems (empty when within it).
+# Takes the best of a few runs so a busy machine does not fail the check on its own.
+def check_import_budget(environment, budget_us=IMPORT_BUDGET_US, runs=5):
+    runs = [measure_import_time(environment) for _ in range(runs)]
+    best = min(modules["main"] for modules in runs)
+    problems = []
+    if best > budget_us:
+        problems.append(f"import main took {best} µs, over the {budget_us} µs budget")
+    loaded = sorted(name for name in runs[0] if name.split(".")[0] in IMPORT_FORBIDDEN)
+    if loaded:
+        problems.append(f"import main loaded {', '.join(loaded)}")
+    return best, problems
+
+# Function to run every benchmark, returns the results document
+def run_benchmarks(args):
+    cache_dir = tempfile.mkdtemp(prefix="travel-advisor-bench-")
+    environment = dict(os.environ)
+    environment["TRAVEL_ADVISOR_CACHE"] = os.path.join(cache_dir, "responses.sqlite3")
+    environment["TRAVEL_ADVISOR_COUNTRIES"] = os.path.join(cache_dir, "no-snapshot.json")
+    os.environ.update(environment)
+
+    server, base_url = start_mock_upstream(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        service_latency=dict(args.service_latency), seed=args.seed
+    )
+
+    results = {"startup": measure_startup(args.startup_iterations, environment)}
+    import_us, import_problems = check_import_budget(environment)
+    results["import_main"] = {"us": import_us, "budget_us": IMPORT_BUDGET_US, "problems": import_problems}
+
+    sys.path.insert(0, PROJECT_DIR)
+    import main
+    from rich.console import Console
+    main.console = Console(quiet=True)
+    main.set_upstream(base_url)
+
+    started = time.perf_counter()
+    main.get_country_index()
+    results["country_index_load"] = {"ms": round((time.perf_counter() - started) * 1000, 3)}
+
+    names = COUNTRY_NAMES
+    results["lookup_cold"] = measure(lambda i: lookup(main, names[i % len(names)]), args.iterations,
+                                     before=lambda: reset_caches(main))
+    # Warm every cache once so the warm run measures hits only
+    for name in names:
+        lookup(main, name)
+    results["lookup_warm"] = measure(lambda i: lookup(main, names[i % len(names)]), args.iterations)
+
+    comparison = lambda i: main.compare_locations([main.resolve_query(name) for name in names])
+    results["compare_cold"] = measure(comparison, max(1, args.iterations // 4), before=lambda: reset_caches(main))
+    results["compare_warm"] = measure(comparison, args.iterations)
+    results["compare_cold"]["locations"] = results["compare_warm"]["locations"] = len(names)
+
+    # Cache hit path on its own: one cached restcountries response read back and parsed
+    key_url = f"{main.RESTCOUNTRIES_URL}/all"
+    params = {"fields": main.COUNTRY_FIELDS}
+    main.cached_get_json("restcountries", key_url, params=params)
+    results["cache_hit"] = measure(lambda i: main.cached_get_json("restcountries", key_url, params=params),
+                                   args.iterations * 10)
+
+    # Batch throughput over a cold cache, the queries cycle through every mock country
+    reset_caches(main)
+    queries = io.StringIO("\n".join(names[i % len(names)] for i in range(args.batch_size)))
+    output = io.StringIO()
+    started = time.perf_counter()
+    counts = main.run_batch(queries, output, args.concurrency)
+    elapsed = time.perf_counter() - started
+    results["batch"] = {
+        "queries": args.batch_size,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 3),
+        "queries_per_second": round(args.batch_size / elapsed, 1),
+        "counts": counts
+    }
+
+    results["upstream_requests"] = dict(server.request_counts)
+    server.shutdown()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "service_latency": dict(args.service_latency),
+            "seed": args.seed,
+            "iterations": args.iterations
+        },
+        "results": results
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Travel & Weather Advisor against a local mock upstream")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds the mock adds to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many random extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock responses that are 503s")
+    parser.add_argument("--service-latency", type=parse_service_latency, action="append", default=[],
+                        help=f"per-service latency override, one of {', '.join(SERVICES)}, e.g. travel_advisory=0.5")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=50, help="runs per latency benchmark")
+    parser.add_argument("--startup-iterations", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=500, help="queries in the batch throughput run")
+    parser.add_argument("--concurrency", type=int, default=16, help="batch mode concurrency")
+    parser.add_argument("--output", default="-", help="file to write the JSON results to (default: stdout)")
+    parser.add_argument("--check-import-budget", action="store_true",
+                        help="only check `import main` against the import-time budget, exit 1 when over it")
+    args = parser.parse_args()
+
+    if args.check_import_budget:
+        import_us, import_problems = check_import_budget(dict(os.environ))
+        for problem in import_problems:
+            print(f"FAIL: {problem}", file=sys.stderr)
+        if not import_problems:
+            print(f"OK: import main took {import_us} µs (budget {IMPORT_BUDGET_US} µs)")
+        sys.exit(1 if import_problems else 0)
+
+    report = json.dumps(run_benchmarks(args), indent=2)
+    if args.output == "-":
+        print(report)
+    else:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(report + "\n")
@@ -1,28 +1,911 @@
-import requests
+import argparse
+import atexit
+import bisect
+import datetime
+import difflib
+import functools
+import heapq
+import importlib
 import json
+import math
+import os
+import re
+import sqlite3
 import sys
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.text import Text
-from rich.prompt import Prompt
-from rich import box
-
-# Initialize Rich console
-console = Console()
-
-# API URLs
-RESTCOUNTRIES_URL = "https://restcountries.com/v3.1"
-OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
-TRAVEL_ADVISORY_URL = "https://www.travel-advisory.info/api"
-NAGER_DATE_URL = "https://date.nager.at/api/v3"
-
-# Function to get country information by name
+import threading
+import time
+import unicodedata
+from urllib.parse import parse_qs, urlencode, urlsplit
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+
+# Stand-in for a module, or one of its attributes, that is only imported the first time it is used.
+# Rich, requests and asyncio together take most of the start-up time, and batch runs on a warm
+# cache or a headless server never need Rich at all.
+class LazyImport:
+    def __init__(self, module, attribute=None):
+        self.module = module
+        self.attribute = attribute
+
+    def load(self):
+        module = importlib.import_module(self.module)
+        return getattr(module, self.attribute) if self.attribute else module
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+requests = LazyImport("requests")
+asyncio = LazyImport("asyncio")
+Console = LazyImport("rich.console", "Console")
+Panel = LazyImport("rich.panel", "Panel")
+Table = LazyImport("rich.table", "Table")
+Text = LazyImport("rich.text", "Text")
+Prompt = LazyImport("rich.prompt", "Prompt")
+Live = LazyImport("rich.live", "Live")
+Segment = LazyImport("rich.segment", "Segment")
+box = LazyImport("rich.box")
+
+# Rich markup tags such as [bold red] or [/bold red]
+MARKUP_TAG = re.compile(r"\[/?[a-z#@][^\[\]]*\]")
+
+# Console that only builds the Rich console it wraps when something is first printed
+class LazyConsole:
+    def __init__(self, **options):
+        self.options = options
+        self.console = None
+
+    def load(self):
+        if self.console is None:
+            self.console = Console(**self.options)
+        return self.console
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+# Console for the headless modes: prints plain text to stderr with the Rich markup stripped, so
+# batch and serve never import Rich. Tables and panels (e.g. from --profile) still go through Rich.
+class PlainConsole:
+    def __init__(self):
+        self.rich_console = LazyConsole(stderr=True)
+
+    def print(self, *objects, style=None, **options):
+        if not all(isinstance(item, str) for item in objects):
+            self.rich_console.print(*objects, style=style, **options)
+            return
+        print(*(MARKUP_TAG.sub("", item) for item in objects), file=sys.stderr)
+
+# Initialize the console, Rich is only loaded once the interactive menu prints something
+console = LazyConsole()
+
+# API URLs, each can be overridden from the environment
+RESTCOUNTRIES_URL = os.environ.get("TRAVEL_ADVISOR_RESTCOUNTRIES_URL", "https://restcountries.com/v3.1")
+OPEN_METEO_URL = os.environ.get("TRAVEL_ADVISOR_OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+TRAVEL_ADVISORY_URL = os.environ.get("TRAVEL_ADVISOR_TRAVEL_ADVISORY_URL", "https://www.travel-advisory.info/api")
+NAGER_DATE_URL = os.environ.get("TRAVEL_ADVISOR_NAGER_DATE_URL", "https://date.nager.at/api/v3")
+
+# Function to point every API at one base URL, e.g. the local stand-in from mock_upstream.py
+def set_upstream(base_url):
+    global RESTCOUNTRIES_URL, OPEN_METEO_URL, TRAVEL_ADVISORY_URL, NAGER_DATE_URL
+    base_url = base_url.rstrip("/")
+    RESTCOUNTRIES_URL = f"{base_url}/restcountries/v3.1"
+    OPEN_METEO_URL = f"{base_url}/open-meteo/v1/forecast"
+    TRAVEL_ADVISORY_URL = f"{base_url}/travel-advisory/api"
+    NAGER_DATE_URL = f"{base_url}/nager/api/v3"
+
+# Most coordinates sent to Open-Meteo in one request, and the size (degrees) of the grid weather
+# requests snap to (about 10 km, close to the forecast models' own resolution) so nearby
+# requests share one upstream call and cache entry
+WEATHER_BATCH_SIZE = 50
+WEATHER_GRID_DEGREES = 0.1
+
+# Comparison scoring: ideal temperature and how far from it still counts as comfortable (°C),
+# wind speed treated as the worst case (km/h), and the weight of each metric in the overall score
+COMFORT_TEMPERATURE = 22
+COMFORT_RANGE = 15
+WIND_LIMIT = 60
+COMPARE_WEIGHTS = {"comfort": 0.4, "weather": 0.3, "wind": 0.1, "advisory": 0.2}
+COMPARE_DETAIL_LIMIT = 5
+
+# Forecast analysis: precipitation probability (%) that counts as a rain risk, the daytime
+# hours considered for outdoor activities, and how many results to show
+RAIN_RISK_THRESHOLD = 50
+DAYTIME_HOURS = (8, 20)
+BEST_HOURS_COUNT = 5
+RAIN_WINDOWS_SHOWN = 5
+
+# WMO weathercodes as used by Open-Meteo: https://open-meteo.com/en/docs
+# Each code has a description, a category, a severity for travel from 0 (clear) to 1 (worst) and advice
+WeatherCondition = namedtuple("WeatherCondition", ["code", "description", "category", "severity", "advice"])
+
+CLEAR_ADVICE = "Clear skies are perfect for outdoor activities!"
+CLOUDY_ADVICE = "Partly cloudy conditions are good for sightseeing."
+FOG_ADVICE = "Be careful when traveling due to fog conditions."
+RAIN_ADVICE = "Bring an umbrella as rain is expected."
+FREEZING_RAIN_ADVICE = "Freezing rain is expected. Watch for icy roads and sidewalks."
+SNOW_ADVICE = "Snow is expected. Dress warmly and check road conditions."
+SHOWERS_ADVICE = "Rain showers are expected. Plan indoor activities or bring rain gear."
+THUNDERSTORM_ADVICE = "Thunderstorms are expected. Stay indoors and avoid open areas."
+
+WEATHER_CONDITIONS = [
+    (0, "Clear sky", "Clear", 0.0, CLEAR_ADVICE),
+    (1, "Mainly clear", "Cloudy", 0.05, CLOUDY_ADVICE),
+    (2, "Partly cloudy", "Cloudy", 0.1, CLOUDY_ADVICE),
+    (3, "Overcast", "Cloudy", 0.15, CLOUDY_ADVICE),
+    (45, "Fog", "Fog", 0.4, FOG_ADVICE),
+    (48, "Depositing rime fog", "Fog", 0.45, FOG_ADVICE),
+    (51, "Light drizzle", "Drizzle", 0.3, RAIN_ADVICE),
+    (53, "Moderate drizzle", "Drizzle", 0.35, RAIN_ADVICE),
+    (55, "Dense drizzle", "Drizzle", 0.4, RAIN_ADVICE),
+    (56, "Light freezing drizzle", "Freezing rain", 0.6, FREEZING_RAIN_ADVICE),
+    (57, "Dense freezing drizzle", "Freezing rain", 0.65, FREEZING_RAIN_ADVICE),
+    (61, "Slight rain", "Rain", 0.45, RAIN_ADVICE),
+    (63, "Moderate rain", "Rain", 0.55, RAIN_ADVICE),
+    (65, "Heavy rain", "Rain", 0.7, RAIN_ADVICE),
+    (66, "Light freezing rain", "Freezing rain", 0.75, FREEZING_RAIN_ADVICE),
+    (67, "Heavy freezing rain", "Freezing rain", 0.85, FREEZING_RAIN_ADVICE),
+    (71, "Slight snow", "Snow", 0.6, SNOW_ADVICE),
+    (73, "Moderate snow", "Snow", 0.7, SNOW_ADVICE),
+    (75, "Heavy snow", "Snow", 0.8, SNOW_ADVICE),
+    (77, "Snow grains", "Snow", 0.55, SNOW_ADVICE),
+    (80, "Slight rain showers", "Rain showers", 0.45, SHOWERS_ADVICE),
+    (81, "Moderate rain showers", "Rain showers", 0.55, SHOWERS_ADVICE),
+    (82, "Violent rain showers", "Rain showers", 0.75, SHOWERS_ADVICE),
+    (85, "Slight snow showers", "Snow", 0.65, SNOW_ADVICE),
+    (86, "Heavy snow showers", "Snow", 0.8, SNOW_ADVICE),
+    (95, "Thunderstorm", "Thunderstorm", 0.85, THUNDERSTORM_ADVICE),
+    (96, "Thunderstorm with slight hail", "Thunderstorm", 0.95, THUNDERSTORM_ADVICE),
+    (99, "Thunderstorm with heavy hail", "Thunderstorm", 1.0, THUNDERSTORM_ADVICE),
+]
+
+# Lookup table indexed by code (0-99), built once so classifying a code is a single index
+UNKNOWN_WEATHER = WeatherCondition(None, "Unknown", "Unknown", 0.5, "")
+WEATHER_CODE_TABLE = [UNKNOWN_WEATHER] * 100
+for condition in WEATHER_CONDITIONS:
+    WEATHER_CODE_TABLE[condition[0]] = WeatherCondition(*condition)
+WEATHER_CODE_TABLE = tuple(WEATHER_CODE_TABLE)
+WEATHER_SEVERITIES = tuple(condition.severity for condition in WEATHER_CODE_TABLE)
+
+# Queries in flight at once in batch mode
+BATCH_CONCURRENCY = 16
+
+# Server mode: worker threads running lookups for the event loop, how long an idle keep-alive
+# connection is held open (seconds), and the most locations one /compare request may ask for
+SERVER_WORKERS = 32
+SERVER_IDLE_TIMEOUT = 15
+COMPARE_MAX_LOCATIONS = 200
+NEAREST_MAX_RESULTS = 50
+
+# Watch mode: default seconds between refreshes of one location (the Open-Meteo cache TTL, so a
+# refresh normally costs one upstream request) and the longest the loop sleeps between checks
+WATCH_INTERVAL = 10 * 60
+WATCH_MAX_SLEEP = 1.0
+
+# Per-service timeouts in seconds, so one slow upstream only degrades its own panel
+RESTCOUNTRIES_TIMEOUT = 10
+WEATHER_TIMEOUT = 10
+TRAVEL_ADVISORY_TIMEOUT = 5
+HOLIDAYS_TIMEOUT = 8
+
+# Metrics: bucket upper bounds for latency (seconds) and payload size (bytes) histograms
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+METRIC_HELP = {
+    "travel_advisor_upstream_seconds": ("histogram", "Time spent on each upstream HTTP request"),
+    "travel_advisor_upstream_response_bytes": ("histogram", "Size of each upstream response body"),
+    "travel_advisor_upstream_errors_total": ("counter", "Upstream requests that failed, by kind"),
+    "travel_advisor_cache_requests_total": ("counter", "Response cache lookups, by result"),
+    "travel_advisor_helper_seconds": ("histogram", "Time spent in each fetch helper, cache hits included"),
+    "travel_advisor_render_seconds": ("histogram", "Time spent rendering each console view"),
+    "travel_advisor_watch_rows_rendered_total": ("counter", "Watch mode rows rendered again after their data changed"),
+}
+
+# Thread-safe counters and histograms, exportable as Prometheus text or JSON
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = {"buckets": buckets, "counts": [0] * len(buckets), "count": 0, "sum": 0.0}
+                self.histograms[key] = histogram
+            position = bisect.bisect_left(buckets, value)
+            if position < len(buckets):
+                histogram["counts"][position] += 1
+            histogram["count"] += 1
+            histogram["sum"] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), "count": histogram["count"],
+                     "sum": round(histogram["sum"], 6),
+                     "buckets": dict(zip((str(bound) for bound in histogram["buckets"]), histogram["counts"]))}
+                    for (name, labels), histogram in sorted(self.histograms.items())
+                ]
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described and name in METRIC_HELP:
+                metric_type, help_text = METRIC_HELP[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                described.add(name)
+
+        def format_labels(labels, **extra):
+            pairs = list(labels.items()) + list(extra.items())
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+        for counter in snapshot["counters"]:
+            describe(counter["name"])
+            lines.append(f"{counter['name']}{format_labels(counter['labels'])} {counter['value']}")
+        for histogram in snapshot["histograms"]:
+            name, labels = histogram["name"], histogram["labels"]
+            describe(name)
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels, le='+Inf')} {histogram['count']}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+# Decorator recording how long each call takes in the `metric` histogram under label `name`
+def timed(metric, label, name):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.observe(metric, {label: name}, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+# Function to GET an upstream URL through the shared session, recording latency, size and errors
+def upstream_get(service, url, params=None, timeout=None):
+    started = time.perf_counter()
+    try:
+        response = get_http_session().get(url, params=params, timeout=timeout)
+    except requests.exceptions.Timeout:
+        metrics.increment("travel_advisor_upstream_errors_total", {"service": service, "kind": "timeout"})
+        raise
+    except requests.exceptions.RequestException:
+        metrics.increment("travel_advisor_upstream_errors_total", {"service": service, "kind": "connection"})
+        raise
+    finally:
+        metrics.observe("travel_advisor_upstream_seconds", {"service": service}, time.perf_counter() - started)
+    metrics.observe("travel_advisor_upstream_response_bytes", {"service": service}, len(response.content), SIZE_BUCKETS)
+    if response.status_code != 200:
+        metrics.increment("travel_advisor_upstream_errors_total", {"service": service, "kind": f"http_{response.status_code}"})
+    return response
+
+# Shared HTTP session settings: one keep-alive pool per upstream host, bounded retries with backoff
+HTTP_POOL_HOSTS = 8
+HTTP_POOL_SIZE = 16
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Function to build the session every API helper shares
+def create_session():
+    import certifi
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry, make_headers
+    
+    session = requests.Session()
+    # Retry-After is ignored: urllib3 2.4 sleeps for whatever the server asks, with no upper limit,
+    # which would pin a fetch_pool worker. The backoff below keeps every retry short.
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # Advertises brotli as well as gzip/deflate when the brotli package is installed
+    session.headers["Accept-Encoding"] = make_headers(accept_encoding=True)["accept-encoding"]
+    session.verify = os.environ.get("REQUESTS_CA_BUNDLE") or certifi.where()
+    return session
+
+# The shared session, created by the first upstream request
+http_session = None
+http_session_lock = threading.Lock()
+
+# Function to return the shared session, creating it on first use
+def get_http_session():
+    global http_session
+    if http_session is None:
+        with http_session_lock:
+            if http_session is None:
+                http_session = create_session()
+    return http_session
+
+# Function to report, per upstream host, how many requests were served over how many connections
+def get_connection_stats():
+    stats = {}
+    if http_session is None:
+        return stats
+    for adapter in set(http_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for pool_key in pools.keys():
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            stats[host] = {
+                "connections": pool.num_connections,
+                "requests": pool.num_requests,
+                "reused": max(0, pool.num_requests - pool.num_connections)
+            }
+    return stats
+
+# Years after the current one to index when looking for upcoming holidays
+HOLIDAY_YEARS_AHEAD = 1
+
+# Days after the start date covered by a holiday range query when no end date is given
+HOLIDAY_QUERY_DAYS = 90
+
+# Most calendar years a single holiday range query may cover, each one is an upstream request per country
+HOLIDAY_QUERY_MAX_YEARS = 3
+
+# How long (seconds) a year that could not be fetched for a country is skipped before asking again
+HOLIDAY_RETRY_INTERVAL = 10 * 60
+
+# How often (seconds) the in-memory travel advisory snapshot is re-downloaded in the background
+ADVISORY_REFRESH_INTERVAL = 6 * 3600
+
+# How long (seconds) to stop asking for the snapshot after a download fails with nothing cached
+ADVISORY_RETRY_INTERVAL = 5 * 60
+
+# Shared worker pool for fetching the per-country data concurrently
+FETCH_WORKERS = 8
+fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+
+# On-disk response cache
+CACHE_PATH = os.environ.get(
+    "TRAVEL_ADVISOR_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "travel_advisor", "responses.sqlite3")
+)
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+CACHE_MEMORY_ENTRIES = 256
+
+# How long (seconds) a cached response is fresh for each endpoint, and how much longer
+# a stale copy may still be served while it is refreshed in the background
+CACHE_TTLS = {
+    "restcountries": 7 * 24 * 3600,
+    "nager_date": 7 * 24 * 3600,
+    "travel_advisory": 6 * 3600,
+    "open_meteo": 10 * 60,
+}
+CACHE_STALE_WINDOWS = {
+    "restcountries": 30 * 24 * 3600,
+    "nager_date": 30 * 24 * 3600,
+    "travel_advisory": 24 * 3600,
+    "open_meteo": 20 * 60,
+}
+
+# SQLite-backed response cache with least-recently-used eviction once it grows past max_bytes.
+# The most recently used entries are also kept in memory so hot lookups skip SQLite entirely.
+class ResponseCache:
+    def __init__(self, path, max_bytes, memory_entries=CACHE_MEMORY_ENTRIES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.connection = None
+        self.total_bytes = 0
+
+    def remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def connect(self):
+        if self.connection is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, endpoint TEXT, body TEXT, size INTEGER, "
+                "fetched_at REAL, accessed_at REAL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self.total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        return self.connection
+
+    # Returns (body, fetched_at) or None
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+            connection = self.connect()
+            row = connection.execute("SELECT body, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                connection.commit()
+                self.remember(key, row)
+            return row
+
+    def set(self, key, endpoint, body):
+        now = time.time()
+        size = len(body)
+        with self.lock:
+            connection = self.connect()
+            old = connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, body, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, body, size, now, now)
+            )
+            self.total_bytes += size - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self.evict(connection)
+            connection.commit()
+            self.remember(key, (body, now))
+
+    # Drop least recently used entries until the cache is back under 90% of its budget
+    def evict(self, connection):
+        target = self.max_bytes * 0.9
+        rows = connection.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.memory.pop(key, None)
+            self.total_bytes -= size
+
+    def clear(self):
+        with self.lock:
+            connection = self.connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+            self.memory.clear()
+            self.total_bytes = 0
+
+response_cache = ResponseCache(CACHE_PATH, CACHE_MAX_BYTES)
+refreshing_keys = set()
+refreshing_lock = threading.Lock()
+
+# Lets concurrent callers asking for the same thing share one upstream call and its parsed result
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.counts = {}
+
+    def do(self, endpoint, key, function, *args):
+        with self.lock:
+            counts = self.counts.setdefault(endpoint, {"upstream": 0, "coalesced": 0})
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.calls[key] = future
+                counts["upstream"] += 1
+            else:
+                counts["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+        try:
+            result = function(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+    def stats(self):
+        with self.lock:
+            return {endpoint: dict(counts) for endpoint, counts in self.counts.items()}
+
+single_flight = SingleFlight()
+
+# Function to report, per endpoint, how many upstream calls were made and how many callers shared one
+def get_coalescing_stats():
+    return single_flight.stats()
+
+# Function to fetch a URL and store successful responses in the cache
+def fetch_and_cache(endpoint, key, url, params, timeout):
+    response = upstream_get(endpoint, url, params=params, timeout=timeout)
+    if response.status_code != 200:
+        return response.status_code, None
+    data = response.json()
+    write_cache(endpoint, key, response.text)
+    return response.status_code, data
+
+# Function to refresh a stale cache entry without making the caller wait
+def refresh_in_background(endpoint, key, url, params, timeout):
+    with refreshing_lock:
+        if key in refreshing_keys:
+            return
+        refreshing_keys.add(key)
+
+    def refresh():
+        try:
+            fetch_and_cache(endpoint, key, url, params, timeout)
+        except requests.exceptions.RequestException:
+            pass
+        finally:
+            with refreshing_lock:
+                refreshing_keys.discard(key)
+
+    fetch_pool.submit(refresh)
+
+# Function to build the cache key for a request
+def cache_key(url, params=None):
+    return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+# Function to read a cached response, returns (data, age in seconds) or (None, None) on a miss
+def read_cache(key):
+    try:
+        entry = response_cache.get(key)
+    except (sqlite3.Error, OSError) as e:
+        console.print(f"[bold yellow]Warning:[/bold yellow] Could not read response cache: {e}")
+        return None, None
+    if not entry:
+        return None, None
+    body, fetched_at = entry
+    return json.loads(body), time.time() - fetched_at
+
+# Function to store a response body that was fetched outside cached_get_json
+def write_cache(endpoint, key, body):
+    try:
+        response_cache.set(key, endpoint, body)
+    except (sqlite3.Error, OSError) as e:
+        console.print(f"[bold yellow]Warning:[/bold yellow] Could not write response cache: {e}")
+
+# Function to GET a JSON endpoint through the response cache, returns (status_code, data)
+def cached_get_json(endpoint, url, params=None, timeout=None):
+    key = cache_key(url, params)
+    data, age = read_cache(key)
+
+    if data is not None:
+        if age < CACHE_TTLS[endpoint]:
+            metrics.increment("travel_advisor_cache_requests_total", {"endpoint": endpoint, "result": "hit"})
+            return 200, data
+        if age < CACHE_TTLS[endpoint] + CACHE_STALE_WINDOWS[endpoint]:
+            # Stale-while-revalidate: answer from the cache now, refresh for the next caller
+            metrics.increment("travel_advisor_cache_requests_total", {"endpoint": endpoint, "result": "stale"})
+            refresh_in_background(endpoint, key, url, params, timeout)
+            return 200, data
+
+    metrics.increment("travel_advisor_cache_requests_total", {"endpoint": endpoint, "result": "miss"})
+    # Identical requests already in flight share that call instead of sending their own
+    return single_flight.do(endpoint, key, fetch_and_cache, endpoint, key, url, params, timeout)
+
+# Local country index, built from one bulk restcountries download or a snapshot file.
+# restcountries allows at most 10 fields per request, so capital coordinates come from a
+# second bulk request and are merged in by cca3.
+COUNTRY_FIELDS = "name,capital,region,population,latlng,cca2,cca3,languages,currencies,altSpellings"
+CAPITAL_FIELDS = "cca3,capitalInfo"
+COUNTRY_SNAPSHOT_PATH = os.environ.get(
+    "TRAVEL_ADVISOR_COUNTRIES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "countries.json")
+)
+FUZZY_MATCH_CUTOFF = 0.8
+
+# How long (seconds) to skip the bulk country download after it fails
+COUNTRY_INDEX_RETRY_INTERVAL = 5 * 60
+
+# The restcountries fields the advisor uses, parsed once into a compact immutable record
+# instead of keeping the raw JSON objects around
+Country = namedtuple("Country", ["name", "official_name", "capital", "region", "population", "latlng",
+                                 "capital_latlng", "cca2", "cca3", "languages", "currencies"])
+
+# Function to parse one restcountries JSON object into a Country record.
+# languages holds the language names, currencies holds (code, name) pairs.
+def parse_country(data):
+    name = data.get("name", {})
+    return Country(
+        name=name.get("common"),
+        official_name=name.get("official"),
+        capital=tuple(data.get("capital", ())),
+        region=data.get("region"),
+        population=data.get("population"),
+        latlng=tuple(data.get("latlng", ())),
+        capital_latlng=tuple(data.get("capitalInfo", {}).get("latlng", ())),
+        cca2=data.get("cca2"),
+        cca3=data.get("cca3"),
+        languages=tuple(data.get("languages", {}).values()),
+        currencies=tuple((code, info.get("name", "Unknown")) for code, info in data.get("currencies", {}).items())
+    )
+
+# Function to get the coordinates to fetch a country's weather for: its capital when known,
+# otherwise the country's centroid
+def weather_location(country):
+    latitude, longitude = (country.capital_latlng or country.latlng)[:2]
+    return latitude, longitude
+
+# A place in the spatial index: a capital city or a country centroid
+Place = namedtuple("Place", ["kind", "name", "latitude", "longitude", "country"])
+
+EARTH_RADIUS_KM = 6371.0
+
+# Function to turn latitude/longitude into a point on the unit sphere
+def sphere_point(latitude, longitude):
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    return (math.cos(latitude) * math.cos(longitude), math.cos(latitude) * math.sin(longitude), math.sin(latitude))
+
+# Function to convert the straight-line distance between two unit sphere points to km along the surface
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+# Function to convert km along the surface to the straight-line distance between unit sphere points
+def km_to_chord(distance_km):
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+# k-d tree over places on the unit sphere, for nearest-neighbour and radius queries.
+# Working in 3D keeps distances right across the antimeridian and near the poles.
+class SpatialIndex:
+    def __init__(self, places):
+        self.places = places
+        self.points = [sphere_point(place.latitude, place.longitude) for place in places]
+        self.root = self.build(list(range(len(places))), 0)
+
+    # Each node is (position, axis, left, right), split on the median along x, y, z in turn
+    def build(self, positions, depth):
+        if not positions:
+            return None
+        axis = depth % 3
+        positions.sort(key=lambda position: self.points[position][axis])
+        middle = len(positions) // 2
+        return (positions[middle], axis,
+                self.build(positions[:middle], depth + 1), self.build(positions[middle + 1:], depth + 1))
+
+    def squared_distance(self, position, target):
+        point = self.points[position]
+        return (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+
+    # Returns up to `count` (distance_km, place) pairs, closest first
+    def nearest(self, latitude, longitude, count=1):
+        target = sphere_point(latitude, longitude)
+        best = []  # max-heap of (-squared distance, position)
+
+        def search(node):
+            if node is None:
+                return
+            position, axis, left, right = node
+            distance = self.squared_distance(position, target)
+            if len(best) < count:
+                heapq.heappush(best, (-distance, position))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, position))
+            difference = target[axis] - self.points[position][axis]
+            near, far = (left, right) if difference < 0 else (right, left)
+            search(near)
+            if len(best) < count or difference * difference < -best[0][0]:
+                search(far)
+
+        search(self.root)
+        return [(chord_to_km(math.sqrt(-distance)), self.places[position])
+                for distance, position in sorted(best, reverse=True)]
+
+    # Returns every (distance_km, place) pair within radius_km, closest first
+    def within(self, latitude, longitude, radius_km):
+        target = sphere_point(latitude, longitude)
+        # A negative radius would square to a positive limit, so it is treated as zero
+        limit = km_to_chord(max(0.0, radius_km)) ** 2
+        found = []
+
+        def search(node):
+            if node is None:
+                return
+            position, axis, left, right = node
+            distance = self.squared_distance(position, target)
+            if distance <= limit:
+                found.append((distance, position))
+            difference = target[axis] - self.points[position][axis]
+            if difference < 0 or difference * difference <= limit:
+                search(left)
+            if difference >= 0 or difference * difference <= limit:
+                search(right)
+
+        search(self.root)
+        return [(chord_to_km(math.sqrt(distance)), self.places[position]) for distance, position in sorted(found)]
+
+# Function to normalize a name for lookups: no accents, no punctuation, case-folded
+def normalize_name(name):
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    cleaned = "".join(c if c.isalnum() else " " for c in stripped.casefold())
+    return " ".join(cleaned.split())
+
+# In-memory lookup tables over the full restcountries dataset, holding Country records,
+# plus a spatial index over every capital and country centroid
+class CountryIndex:
+    def __init__(self, countries):
+        self.countries = []
+        self.by_name = {}
+        self.by_capital = {}
+        places = []
+        for data in countries:
+            country = parse_country(data)
+            self.countries.append(country)
+            names = [country.name, country.official_name, country.cca2, country.cca3]
+            names.extend(data.get("altSpellings", []))
+            for name in names:
+                self.add(self.by_name, name, country)
+            for capital in country.capital:
+                self.add(self.by_capital, capital, country)
+            if len(country.capital_latlng) == 2 and country.capital:
+                places.append(Place("capital", country.capital[0], *country.capital_latlng, country))
+            if len(country.latlng) == 2:
+                places.append(Place("centroid", country.name, *country.latlng, country))
+        self.name_keys = sorted(self.by_name)
+        self.capital_keys = sorted(self.by_capital)
+        self.places = SpatialIndex(places)
+
+    def add(self, table, name, country):
+        key = normalize_name(name) if name else ""
+        if key:
+            matches = table.setdefault(key, [])
+            if country not in matches:
+                matches.append(country)
+
+    # Exact match first, then every key starting with the query, then the closest spellings
+    def lookup(self, table, keys, query):
+        key = normalize_name(query)
+        if not key:
+            return []
+        if key in table:
+            return list(table[key])
+
+        matches = []
+        position = bisect.bisect_left(keys, key)
+        while position < len(keys) and keys[position].startswith(key):
+            for country in table[keys[position]]:
+                if country not in matches:
+                    matches.append(country)
+            position += 1
+        if not matches:
+            for close_key in difflib.get_close_matches(key, keys, n=3, cutoff=FUZZY_MATCH_CUTOFF):
+                for country in table[close_key]:
+                    if country not in matches:
+                        matches.append(country)
+        matches.sort(key=lambda country: country.population or 0, reverse=True)
+        return matches
+
+    def find_by_name(self, name):
+        return self.lookup(self.by_name, self.name_keys, name)
+
+    def find_by_capital(self, capital):
+        return self.lookup(self.by_capital, self.capital_keys, capital)
+
+    def nearest(self, latitude, longitude, count=1):
+        return self.places.nearest(latitude, longitude, count)
+
+    def within(self, latitude, longitude, radius_km):
+        return self.places.within(latitude, longitude, radius_km)
+
+country_index = None
+country_index_retry_at = None
+country_index_lock = threading.Lock()
+
+# Function to download every capital's coordinates, returns {cca3: capitalInfo} (empty if unavailable)
+def download_capitals():
+    try:
+        status_code, data = cached_get_json("restcountries", f"{RESTCOUNTRIES_URL}/all",
+                                            params={"fields": CAPITAL_FIELDS}, timeout=RESTCOUNTRIES_TIMEOUT)
+    except requests.exceptions.RequestException:
+        return {}
+    if status_code != 200:
+        return {}
+    return {entry.get("cca3"): entry.get("capitalInfo") for entry in data if entry.get("capitalInfo")}
+
+# Function to download every country in one request, plus one for the capitals' coordinates
+# (cached like any other restcountries response)
+def download_all_countries():
+    try:
+        status_code, data = cached_get_json("restcountries", f"{RESTCOUNTRIES_URL}/all",
+                                            params={"fields": COUNTRY_FIELDS}, timeout=RESTCOUNTRIES_TIMEOUT)
+        if status_code == 200:
+            capitals = download_capitals()
+            return [dict(country, capitalInfo=capitals[country.get("cca3")]) if country.get("cca3") in capitals
+                    else country for country in data]
+        console.print("[bold yellow]Warning:[/bold yellow] Could not download the country list")
+        return None
+    except requests.exceptions.RequestException as e:
+        console.print(f"[bold yellow]Warning:[/bold yellow] Country list unavailable: {e}")
+        return None
+
+# Function to get the country index, loading it from the snapshot or one bulk download on first use
+# A failed download is remembered, and lookups fall back to the per-query endpoints until
+# COUNTRY_INDEX_RETRY_INTERVAL has passed instead of queueing behind another bulk attempt.
+def get_country_index():
+    global country_index, country_index_retry_at
+    if country_index is not None or (country_index_retry_at is not None and time.monotonic() < country_index_retry_at):
+        return country_index
+    with country_index_lock:
+        if country_index is None and (country_index_retry_at is None or time.monotonic() >= country_index_retry_at):
+            countries = None
+            if os.path.exists(COUNTRY_SNAPSHOT_PATH):
+                try:
+                    with open(COUNTRY_SNAPSHOT_PATH, encoding="utf-8") as snapshot:
+                        countries = json.load(snapshot)
+                except (OSError, ValueError) as e:
+                    console.print(f"[bold yellow]Warning:[/bold yellow] Could not read country snapshot: {e}")
+            if not countries:
+                countries = download_all_countries()
+            if countries:
+                country_index = CountryIndex(countries)
+                country_index_retry_at = None
+            else:
+                country_index_retry_at = time.monotonic() + COUNTRY_INDEX_RETRY_INTERVAL
+        return country_index
+
+# Function to save the full country list as a snapshot so lookups work with no network at all
+def save_country_snapshot(path=COUNTRY_SNAPSHOT_PATH):
+    countries = download_all_countries()
+    if not countries:
+        return False
+    with open(path, "w", encoding="utf-8") as snapshot:
+        json.dump(countries, snapshot, ensure_ascii=False)
+    console.print(f"[bold green]Saved {len(countries)} countries to {path}[/bold green]")
+    return True
+
+# Function to get country information by name, returns a list of Country records
+@timed("travel_advisor_helper_seconds", "helper", "get_country_info")
 def get_country_info(country_name):
+    index = get_country_index()
+    if index:
+        matches = index.find_by_name(country_name)
+        if not matches:
+            console.print(f"[bold red]Error:[/bold red] Could not find country '{country_name}'")
+            return None
+        return matches
+
     try:
-        response = requests.get(f"{RESTCOUNTRIES_URL}/name/{country_name}")
-        if response.status_code == 200:
-            return response.json()
+        status_code, data = cached_get_json("restcountries", f"{RESTCOUNTRIES_URL}/name/{country_name}",
+                                            params={"fields": COUNTRY_FIELDS}, timeout=RESTCOUNTRIES_TIMEOUT)
+        if status_code == 200:
+            return [parse_country(country) for country in data]
         else:
             console.print(f"[bold red]Error:[/bold red] Could not find country '{country_name}'")
             return None
@@ -30,12 +913,22 @@ def get_country_info(country_name):
         console.print(f"[bold red]Error:[/bold red] {e}")
         return None
 
-# Function to get country information by capital city
+# Function to get country information by capital city, returns a list of Country records
+@timed("travel_advisor_helper_seconds", "helper", "get_country_by_capital")
 def get_country_by_capital(capital_name):
+    index = get_country_index()
+    if index:
+        matches = index.find_by_capital(capital_name)
+        if not matches:
+            console.print(f"[bold red]Error:[/bold red] Could not find country with capital '{capital_name}'")
+            return None
+        return matches
+
     try:
-        response = requests.get(f"{RESTCOUNTRIES_URL}/capital/{capital_name}")
-        if response.status_code == 200:
-            return response.json()
+        status_code, data = cached_get_json("restcountries", f"{RESTCOUNTRIES_URL}/capital/{capital_name}",
+                                            params={"fields": COUNTRY_FIELDS}, timeout=RESTCOUNTRIES_TIMEOUT)
+        if status_code == 200:
+            return [parse_country(country) for country in data]
         else:
             console.print(f"[bold red]Error:[/bold red] Could not find country with capital '{capital_name}'")
             return None
@@ -43,18 +936,31 @@ def get_country_by_capital(capital_name):
         console.print(f"[bold red]Error:[/bold red] {e}")
         return None
 
+# Function to snap coordinates to the grid weather requests are keyed on
+def normalize_coordinates(latitude, longitude):
+    return (round(round(float(latitude) / WEATHER_GRID_DEGREES) * WEATHER_GRID_DEGREES, 4),
+            round(round(float(longitude) / WEATHER_GRID_DEGREES) * WEATHER_GRID_DEGREES, 4))
+
+# Function to build the Open-Meteo query for one or more comma-separated coordinates.
+# Times come back in each location's own time zone, so days and daytime hours are local.
+def weather_params(latitude, longitude):
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current_weather": "true",
+        "hourly": "temperature_2m,precipitation_probability,weathercode",
+        "timezone": "auto"
+    }
+
 # Function to get weather information by coordinates
+@timed("travel_advisor_helper_seconds", "helper", "get_weather")
 def get_weather(latitude, longitude):
     try:
-        params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "current_weather": "true",
-            "hourly": "temperature_2m,precipitation_probability,weathercode"
-        }
-        response = requests.get(OPEN_METEO_URL, params=params)
-        if response.status_code == 200:
-            return response.json()
+        latitude, longitude = normalize_coordinates(latitude, longitude)
+        params = weather_params(latitude, longitude)
+        status_code, data = cached_get_json("open_meteo", OPEN_METEO_URL, params=params, timeout=WEATHER_TIMEOUT)
+        if status_code == 200:
+            return data
         else:
             console.print(f"[bold red]Error:[/bold red] Could not get weather data for coordinates {latitude}, {longitude}")
             return None
@@ -62,31 +968,198 @@ def get_weather(latitude, longitude):
         console.print(f"[bold red]Error:[/bold red] {e}")
         return None
 
-# Function to get travel advisory information
-def get_travel_advisory(country_code):
+# Function to fetch one multi-location Open-Meteo request, returns {(lat, lon): weather_data}
+def fetch_weather_batch(points):
+    params = weather_params(",".join(str(lat) for lat, lon in points), ",".join(str(lon) for lat, lon in points))
     try:
-        # Added verify=False to fix SSL certificate issue
-        response = requests.get(f"{TRAVEL_ADVISORY_URL}?countrycode={country_code}", verify=False)
-        if response.status_code == 200:
-            data = response.json()
-            if data["status"] == "ok" and country_code in data["data"]:
-                return data["data"][country_code]
-            else:
-                console.print(f"[bold yellow]Warning:[/bold yellow] No travel advisory data available for {country_code}")
-                return None
+        response = upstream_get("open_meteo", OPEN_METEO_URL, params=params, timeout=WEATHER_TIMEOUT)
+        if response.status_code != 200:
+            console.print(f"[bold red]Error:[/bold red] Could not get weather data for {len(points)} locations")
+            return {}
+        data = response.json()
+    except requests.exceptions.RequestException as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        return {}
+
+    # A single location comes back as an object, several as a list in request order
+    if isinstance(data, dict):
+        data = [data]
+    results = {}
+    for point, weather_data in zip(points, data):
+        write_cache("open_meteo", cache_key(OPEN_METEO_URL, weather_params(*point)), json.dumps(weather_data))
+        results[point] = weather_data
+    return results
+
+# Function to fetch a multi-location batch, sharing the call with any identical batch already in flight
+def fetch_weather_batch_once(points):
+    return single_flight.do("open_meteo", ("batch", tuple(points)), fetch_weather_batch, points)
+
+# Function to get weather for many coordinates in as few requests as possible.
+# Returns a list lined up with `points`, with None where the weather could not be fetched.
+# Cached entries older than `max_age` seconds are fetched again even if the TTL has not run out.
+@timed("travel_advisor_helper_seconds", "helper", "get_weather_many")
+def get_weather_many(points, max_age=None):
+    points = [normalize_coordinates(lat, lon) for lat, lon in points]
+    max_age = CACHE_TTLS["open_meteo"] if max_age is None else min(max_age, CACHE_TTLS["open_meteo"])
+    results = {}
+    missing = []
+
+    # Identical coordinates are fetched once, and anything still fresh in the cache is not fetched at all
+    for point in dict.fromkeys(points):
+        data, age = read_cache(cache_key(OPEN_METEO_URL, weather_params(*point)))
+        if data is not None and age < max_age:
+            results[point] = data
         else:
-            console.print(f"[bold red]Error:[/bold red] Could not get travel advisory data")
+            missing.append(point)
+    metrics.increment("travel_advisor_cache_requests_total", {"endpoint": "open_meteo", "result": "hit"}, len(results))
+    metrics.increment("travel_advisor_cache_requests_total", {"endpoint": "open_meteo", "result": "miss"}, len(missing))
+
+    batches = [missing[i:i + WEATHER_BATCH_SIZE] for i in range(0, len(missing), WEATHER_BATCH_SIZE)]
+    for batch_results in fetch_pool.map(fetch_weather_batch_once, batches):
+        results.update(batch_results)
+
+    return [results.get(point) for point in points]
+
+# Every country's travel advisory held in memory as {cca2: (score, message, updated, name)}.
+# Loaded from one bulk download of the whole dataset and refreshed on a schedule in the background;
+# if a refresh fails the previous copy keeps answering.
+class AdvisoryStore:
+    def __init__(self, refresh_interval, retry_interval):
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.advisories = None
+        self.updated_at = None
+        self.retry_at = None
+        self.refresher = None
+
+    # Shrink the API payload down to the fields the advisor uses
+    def parse(self, data):
+        if not data or data.get("status") != "ok":
             return None
-    except requests.exceptions.RequestException as e:
-        console.print(f"[bold yellow]Warning:[/bold yellow] Travel advisory service unavailable: {e}")
+        return {
+            country_code: (
+                entry.get("advisory", {}).get("score"),
+                entry.get("advisory", {}).get("message"),
+                entry.get("advisory", {}).get("updated"),
+                entry.get("name")
+            )
+            for country_code, entry in data.get("data", {}).items()
+        }
+
+    def replace(self, advisories):
+        with self.lock:
+            self.advisories = advisories
+            self.updated_at = time.time()
+            self.retry_at = None
+
+    # Forget the snapshot so the next lookup loads it again. The refresher thread, if any, keeps running.
+    def reset(self):
+        with self.lock:
+            self.advisories = None
+            self.updated_at = None
+            self.retry_at = None
+
+    # Remember a failed download so lookups skip the network until the retry interval is up
+    def record_failure(self):
+        with self.lock:
+            if self.advisories is None:
+                self.retry_at = time.monotonic() + self.retry_interval
+
+    def waiting_to_retry(self):
+        return self.retry_at is not None and time.monotonic() < self.retry_at
+
+    # First load: the disk cache if it has a copy, otherwise the network, otherwise any stale copy
+    def load(self):
+        try:
+            status_code, data = cached_get_json("travel_advisory", TRAVEL_ADVISORY_URL, timeout=TRAVEL_ADVISORY_TIMEOUT)
+            if status_code != 200:
+                console.print("[bold red]Error:[/bold red] Could not get travel advisory data")
+                data = None
+        except requests.exceptions.RequestException as e:
+            console.print(f"[bold yellow]Warning:[/bold yellow] Travel advisory service unavailable: {e}")
+            data = None
+        if data is None:
+            data, age = read_cache(cache_key(TRAVEL_ADVISORY_URL))
+        advisories = self.parse(data)
+        if advisories is not None:
+            self.replace(advisories)
+        else:
+            self.record_failure()
+        return advisories is not None
+
+    # Always goes to the network, the cache is updated with whatever comes back
+    def refresh(self):
+        key = cache_key(TRAVEL_ADVISORY_URL)
+        try:
+            status_code, data = single_flight.do("travel_advisory", key, fetch_and_cache, "travel_advisory", key,
+                                                 TRAVEL_ADVISORY_URL, None, TRAVEL_ADVISORY_TIMEOUT)
+        except requests.exceptions.RequestException:
+            self.record_failure()
+            return False
+        advisories = self.parse(data) if status_code == 200 else None
+        if advisories is not None:
+            self.replace(advisories)
+        else:
+            self.record_failure()
+        return advisories is not None
+
+    def start_background_refresh(self):
+        with self.lock:
+            if self.refresher is not None:
+                return
+            self.refresher = threading.Thread(target=self.refresh_forever, name="advisory-refresh", daemon=True)
+        self.refresher.start()
+
+    # Retries sooner while there is no snapshot at all, so the store recovers from a failed first load
+    def refresh_forever(self):
+        while True:
+            time.sleep(self.refresh_interval if self.advisories is not None else self.retry_interval)
+            self.refresh()
+
+    def get(self, country_code):
+        if self.advisories is None:
+            if self.waiting_to_retry():
+                return None
+            with self.load_lock:
+                loaded = self.advisories is not None or (not self.waiting_to_retry() and self.load())
+            self.start_background_refresh()
+            if not loaded:
+                return None
+        entry = self.advisories.get(country_code)
+        if entry is None:
+            return None
+        score, message, updated, name = entry
+        return {"iso_alpha2": country_code, "name": name,
+                "advisory": {"score": score, "message": message, "updated": updated}}
+
+advisory_store = AdvisoryStore(ADVISORY_REFRESH_INTERVAL, ADVISORY_RETRY_INTERVAL)
+
+# Function to get travel advisory information
+@timed("travel_advisor_helper_seconds", "helper", "get_travel_advisory")
+def get_travel_advisory(country_code):
+    if not country_code:
         return None
+    advisory_data = advisory_store.get(country_code)
+    if advisory_data is None and advisory_store.advisories is not None:
+        console.print(f"[bold yellow]Warning:[/bold yellow] No travel advisory data available for {country_code}")
+    return advisory_data
+
+# Function to get travel advisories for many countries at once, lined up with `country_codes`
+def get_travel_advisories(country_codes):
+    return [get_travel_advisory(country_code) if country_code else None for country_code in country_codes]
 
 # Function to get public holidays for a country
-def get_holidays(country_code, year=2025):
+@timed("travel_advisor_helper_seconds", "helper", "get_holidays")
+def get_holidays(country_code, year=None):
+    if year is None:
+        year = datetime.date.today().year
     try:
-        response = requests.get(f"{NAGER_DATE_URL}/PublicHolidays/{year}/{country_code}")
-        if response.status_code == 200:
-            return response.json()
+        status_code, data = cached_get_json("nager_date", f"{NAGER_DATE_URL}/PublicHolidays/{year}/{country_code}",
+                                            timeout=HOLIDAYS_TIMEOUT)
+        if status_code == 200:
+            return data
         else:
             console.print(f"[bold yellow]Warning:[/bold yellow] No holiday data available for {country_code}")
             return None
@@ -94,6 +1167,177 @@ def get_holidays(country_code, year=2025):
         console.print(f"[bold yellow]Warning:[/bold yellow] Holiday service unavailable: {e}")
         return None
 
+# Public holidays per country across several years, kept as date-sorted lists so "next N",
+# date-range and long-weekend queries are binary searches instead of re-downloading whole years
+class HolidayIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.dates = {}
+        self.holidays = {}
+        self.years = {}
+        self.retry_at = {}
+
+    # Load any of `years` not yet indexed for a country (each year is cached on disk by get_holidays).
+    # A year that just failed is skipped until HOLIDAY_RETRY_INTERVAL has passed.
+    def ensure_years(self, country_code, years):
+        now = time.monotonic()
+        with self.lock:
+            indexed = self.years.get(country_code, set())
+            missing = [year for year in years
+                       if year not in indexed and self.retry_at.get((country_code, year), 0) <= now]
+        for year in missing:
+            holidays = get_holidays(country_code, year)
+            if holidays is None:
+                with self.lock:
+                    self.retry_at[(country_code, year)] = time.monotonic() + HOLIDAY_RETRY_INTERVAL
+                continue
+            with self.lock:
+                if year in self.years.setdefault(country_code, set()):
+                    continue
+                self.years[country_code].add(year)
+                merged = self.holidays.get(country_code, []) + [h for h in holidays if h.get("date")]
+                merged.sort(key=lambda holiday: holiday["date"])
+                self.holidays[country_code] = merged
+                self.dates[country_code] = [datetime.date.fromisoformat(h["date"]) for h in merged]
+
+    # Indexes of a country's holidays falling within [start, end]
+    def span(self, country_code, start, end):
+        self.ensure_years(country_code, range(start.year, end.year + 1))
+        with self.lock:
+            dates = self.dates.get(country_code, [])
+            return bisect.bisect_left(dates, start), bisect.bisect_right(dates, end), self.holidays.get(country_code, [])
+
+    # Later years are only fetched when the ones already indexed run out before `count` holidays
+    def next_holidays(self, country_code, after=None, count=5):
+        after = after or datetime.date.today()
+        for year in range(after.year, after.year + HOLIDAY_YEARS_AHEAD + 1):
+            self.ensure_years(country_code, [year])
+            with self.lock:
+                position = bisect.bisect_left(self.dates.get(country_code, []), after)
+                upcoming = self.holidays.get(country_code, [])[position:position + count]
+            if len(upcoming) >= count:
+                break
+        return upcoming
+
+    # Holidays in [start, end] for several countries, merged in date order as (country_code, holiday) pairs
+    def holidays_between(self, country_codes, start, end):
+        per_country = []
+        for country_code in country_codes:
+            first, last, holidays = self.span(country_code, start, end)
+            per_country.append([(holiday["date"], country_code, holiday) for holiday in holidays[first:last]])
+        return [(country_code, holiday) for date, country_code, holiday in heapq.merge(*per_country)]
+
+    # Runs of three or more days off created by holidays next to a weekend within [start, end].
+    # A Thursday or Tuesday holiday counts too, with one bridge day taken off.
+    def long_weekends(self, country_code, start, end):
+        first, last, holidays = self.span(country_code, start, end)
+        holiday_dates = {holiday["date"] for holiday in holidays}
+        weekends = []
+        for holiday in holidays[first:last]:
+            date = datetime.date.fromisoformat(holiday["date"])
+            weekday = date.weekday()
+            if weekday == 0:
+                run = (date - datetime.timedelta(days=2), date)
+            elif weekday == 1:
+                run = (date - datetime.timedelta(days=3), date)
+            elif weekday == 3:
+                run = (date, date + datetime.timedelta(days=3))
+            elif weekday == 4:
+                run = (date, date + datetime.timedelta(days=2))
+            else:
+                continue
+            run_start, run_end = run
+            if weekends and run_start <= weekends[-1]["end"] + datetime.timedelta(days=1):
+                previous = weekends[-1]
+                previous["end"] = max(previous["end"], run_end)
+                previous["holidays"].append(holiday.get("name"))
+            else:
+                weekends.append({"start": run_start, "end": run_end, "holidays": [holiday.get("name")]})
+        for weekend in weekends:
+            weekend["days"] = (weekend["end"] - weekend["start"]).days + 1
+            # A bridge day is any weekday in the run that is not itself a holiday
+            weekend["needs_bridge_day"] = any(
+                day.weekday() < 5 and day.isoformat() not in holiday_dates
+                for day in (weekend["start"] + datetime.timedelta(days=offset) for offset in range(weekend["days"]))
+            )
+            weekend["start"] = weekend["start"].isoformat()
+            weekend["end"] = weekend["end"].isoformat()
+        return weekends
+
+holiday_index = HolidayIndex()
+
+# Function to get the next public holidays for a country from today on
+@timed("travel_advisor_helper_seconds", "helper", "get_upcoming_holidays")
+def get_upcoming_holidays(country_code, count=5):
+    return holiday_index.next_holidays(country_code, datetime.date.today(), count)
+
+# Function to submit a fetch to the shared pool, noting when a worker actually picks it up
+def submit_fetch(fn, *args):
+    picked_up = {"event": threading.Event(), "at": None}
+
+    def run():
+        picked_up["at"] = time.monotonic()
+        picked_up["event"].set()
+        return fn(*args)
+
+    future = fetch_pool.submit(run)
+    future.picked_up = picked_up
+    return future
+
+# Function to wait for a fetch from submit_fetch, giving up once its own timeout has passed since
+# a worker started it. Time spent queued behind other fetches does not count against the timeout.
+def wait_for_result(future, timeout, service_name):
+    future.picked_up["event"].wait()
+    remaining = max(0, future.picked_up["at"] + timeout - time.monotonic())
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeoutError:
+        console.print(f"[bold yellow]Warning:[/bold yellow] {service_name} took longer than {timeout}s, skipping")
+        return None
+
+# Function to fetch weather, travel advisory and holidays for a country all at once
+# "timed_out" lists the services that were given up on, so a dropped panel is not mistaken for no data.
+def fetch_country_details(country_data):
+    details = {"weather": None, "advisory": None, "holidays": None, "timed_out": []}
+    if not country_data:
+        return details
+
+    country = country_data[0]
+    lat, lon = weather_location(country)
+    country_code = country.cca2
+
+    # Send every upstream call at once, so a lookup costs the slowest call instead of the sum
+    futures = [("weather", submit_fetch(get_weather, lat, lon), WEATHER_TIMEOUT, "Weather service")]
+    if country_code:
+        futures.append(("advisory", submit_fetch(get_travel_advisory, country_code), TRAVEL_ADVISORY_TIMEOUT,
+                        "Travel advisory service"))
+        futures.append(("holidays", submit_fetch(get_upcoming_holidays, country_code), HOLIDAYS_TIMEOUT,
+                        "Holiday service"))
+
+    for name, future, timeout, service_name in futures:
+        details[name] = wait_for_result(future, timeout, service_name)
+        if not future.done():
+            details["timed_out"].append(name)
+
+    return details
+
+# Function to classify a weathercode, unknown or missing codes get UNKNOWN_WEATHER
+def classify_weathercode(weathercode):
+    if isinstance(weathercode, int) and 0 <= weathercode < 100:
+        return WEATHER_CODE_TABLE[weathercode]
+    return UNKNOWN_WEATHER
+
+# Function to classify a whole column of weathercodes at once
+def classify_weathercodes(weathercodes):
+    return [classify_weathercode(code) for code in weathercodes]
+
+# Function to get the travel severity (0 to 1) of a whole column of weathercodes at once
+def weathercode_severities(weathercodes):
+    return [
+        WEATHER_SEVERITIES[code] if isinstance(code, int) and 0 <= code < 100 else UNKNOWN_WEATHER.severity
+        for code in weathercodes
+    ]
+
 # Function to get weather advice based on weather data
 def get_weather_advice(weather_data):
     if not weather_data or "current_weather" not in weather_data:
@@ -102,9 +1346,6 @@ def get_weather_advice(weather_data):
     temperature = weather_data["current_weather"]["temperature"]
     weathercode = weather_data["current_weather"]["weathercode"]
     
-    # Weather codes reference: https://open-meteo.com/en/docs
-    # 0: Clear sky, 1-3: Mainly clear/partly cloudy, 45-48: Fog, 51-67: Rain, 71-77: Snow, 80-99: Rain showers
-    
     advice = ""
     
     # Temperature-based advice
@@ -122,30 +1363,129 @@ def get_weather_advice(weather_data):
         advice += "It's freezing! Bundle up with warm layers. "
     
     # Weather condition-based advice
-    if weathercode == 0:
-        advice += "Clear skies are perfect for outdoor activities!"
-    elif weathercode in [1, 2, 3]:
-        advice += "Partly cloudy conditions are good for sightseeing."
-    elif weathercode in [45, 48]:
-        advice += "Be careful when traveling due to fog conditions."
-    elif weathercode in range(51, 68):
-        advice += "Bring an umbrella as rain is expected."
-    elif weathercode in range(71, 78):
-        advice += "Snow is expected. Dress warmly and check road conditions."
-    elif weathercode in range(80, 100):
-        advice += "Rain showers are expected. Plan indoor activities or bring rain gear."
+    advice += classify_weathercode(weathercode).advice
     
     return advice
 
+# Function to score how pleasant each forecast hour is, from 0 to 1
+def hourly_comfort(temperatures, precipitation, severities):
+    return [
+        (1 - min(abs(t - COMFORT_TEMPERATURE) / COMFORT_RANGE, 1)) * (1 - p / 100) * (1 - severity)
+        for t, p, severity in zip(temperatures, precipitation, severities)
+    ]
+
+# Function to analyze the hourly forecast that get_weather already requests.
+# Returns daily summaries, rain-risk windows and the best hours to be outside.
+def analyze_forecast(weather_data):
+    hourly = weather_data.get("hourly", {}) if weather_data else {}
+    columns = [hourly.get(name) or [] for name in ("time", "temperature_2m", "precipitation_probability", "weathercode")]
+    hours = [values for values in zip(*columns) if None not in values]
+    if not hours:
+        return None
+    times, temperatures, precipitation, weathercodes = (list(column) for column in zip(*hours))
+    severities = weathercode_severities(weathercodes)
+    comfort = hourly_comfort(temperatures, precipitation, severities)
+    
+    # Hours are in time order, so each day is one contiguous slice
+    daily = []
+    day_start = 0
+    for i in range(1, len(times) + 1):
+        if i == len(times) or times[i][:10] != times[day_start][:10]:
+            day_temperatures = temperatures[day_start:i]
+            daily.append({
+                "date": times[day_start][:10],
+                "min": min(day_temperatures),
+                "max": max(day_temperatures),
+                "mean": round(sum(day_temperatures) / len(day_temperatures), 1),
+                "max_precipitation_probability": max(precipitation[day_start:i]),
+                "weathercode": weathercodes[max(range(day_start, i), key=severities.__getitem__)],
+                "comfort": round(100 * sum(comfort[day_start:i]) / (i - day_start), 1)
+            })
+            day_start = i
+    
+    # Runs of consecutive hours where rain is likely
+    rain_windows = []
+    window_start = None
+    for i in range(len(times) + 1):
+        rainy = i < len(times) and precipitation[i] >= RAIN_RISK_THRESHOLD
+        if rainy and window_start is None:
+            window_start = i
+        elif not rainy and window_start is not None:
+            rain_windows.append({
+                "start": times[window_start],
+                "end": times[i - 1],
+                "max_precipitation_probability": max(precipitation[window_start:i])
+            })
+            window_start = None
+    
+    # Most comfortable daytime hours across the whole forecast
+    daytime = [i for i in range(len(times)) if DAYTIME_HOURS[0] <= int(times[i][11:13]) < DAYTIME_HOURS[1]]
+    best = sorted(daytime, key=lambda i: comfort[i], reverse=True)[:BEST_HOURS_COUNT]
+    best_hours = [
+        {"time": times[i], "temperature": temperatures[i], "comfort": round(100 * comfort[i], 1)}
+        for i in sorted(best)
+    ]
+    
+    return {"daily": daily, "rain_windows": rain_windows, "best_hours": best_hours,
+            "timezone": weather_data.get("timezone_abbreviation") or weather_data.get("timezone")}
+
+# Function to name the time zone the forecast times are in, for panel titles
+def local_time_label(forecast):
+    return f"local time, {forecast['timezone']}" if forecast.get("timezone") else "local time"
+
+# Function to display the forecast analysis panels
+@timed("travel_advisor_render_seconds", "view", "forecast")
+def display_forecast_analytics(forecast):
+    if not forecast:
+        return
+    
+    forecast_table = Table(title="Forecast Outlook", box=box.ROUNDED, title_style="bold cyan")
+    forecast_table.add_column("Date", style="cyan")
+    forecast_table.add_column("Min", style="yellow")
+    forecast_table.add_column("Max", style="yellow")
+    forecast_table.add_column("Mean", style="yellow")
+    forecast_table.add_column("Rain Chance", style="magenta")
+    forecast_table.add_column("Comfort", style="bold green", justify="right")
+    
+    for day in forecast["daily"]:
+        forecast_table.add_row(
+            day["date"],
+            f"{day['min']}°C",
+            f"{day['max']}°C",
+            f"{day['mean']}°C",
+            f"{day['max_precipitation_probability']}%",
+            str(day["comfort"])
+        )
+    
+    console.print(forecast_table)
+    
+    if forecast["best_hours"]:
+        best_hours = "\n".join(
+            f"{hour['time'].replace('T', ' ')}  {hour['temperature']}°C  (comfort {hour['comfort']})"
+            for hour in forecast["best_hours"]
+        )
+        console.print(Panel(best_hours, title=f"Best Times to Be Outside ({local_time_label(forecast)})",
+                            border_style="green"))
+    
+    if forecast["rain_windows"]:
+        rain_windows = "\n".join(
+            f"{window['start'].replace('T', ' ')} to {window['end'][11:]}  (up to {window['max_precipitation_probability']}%)"
+            for window in forecast["rain_windows"][:RAIN_WINDOWS_SHOWN]
+        )
+        console.print(Panel(rain_windows, title=f"Rain Risk ({local_time_label(forecast)})", border_style="blue"))
+    else:
+        console.print(Panel("No rain expected in the forecast.", title="Rain Risk", border_style="blue"))
+
 # Function to display country and weather information
-def display_country_weather_info(country_data, weather_data):
+@timed("travel_advisor_render_seconds", "view", "country")
+def display_country_weather_info(country_data, weather_data, advisory_data=None, holidays=None):
     if not country_data or not weather_data:
         return
     
     country = country_data[0]  # Take the first result
     
     # Create country info table
-    country_table = Table(title=f"Country Information: {country.get('name', {}).get('common', 'N/A')}", 
+    country_table = Table(title=f"Country Information: {country.name or 'N/A'}", 
                          box=box.ROUNDED, 
                          show_header=False,
                          title_style="bold cyan")
@@ -153,20 +1493,17 @@ def display_country_weather_info(country_data, weather_data):
     country_table.add_column("Property", style="bold green")
     country_table.add_column("Value", style="yellow")
     
-    country_table.add_row("Capital", ", ".join(country.get('capital', ['N/A'])))
-    country_table.add_row("Region", country.get('region', 'N/A'))
-    country_table.add_row("Population", f"{country.get('population', 'N/A'):,}")
+    country_table.add_row("Capital", ", ".join(country.capital) or "N/A")
+    country_table.add_row("Region", country.region or "N/A")
+    country_table.add_row("Population", f"{country.population:,}" if country.population is not None else "N/A")
     
     # Languages
-    if 'languages' in country:
-        languages = ", ".join(country['languages'].values())
-        country_table.add_row("Languages", languages)
+    if country.languages:
+        country_table.add_row("Languages", ", ".join(country.languages))
     
     # Currency
-    if 'currencies' in country:
-        currencies = []
-        for currency_code, currency_info in country['currencies'].items():
-            currencies.append(f"{currency_info.get('name', 'Unknown')} ({currency_code})")
+    if country.currencies:
+        currencies = [f"{currency_name} ({currency_code})" for currency_code, currency_name in country.currencies]
         country_table.add_row("Currencies", ", ".join(currencies))
     
     console.print(country_table)
@@ -181,20 +1518,7 @@ def display_country_weather_info(country_data, weather_data):
     weather_table.add_row("Wind Speed", f"{current.get('windspeed', 'N/A')} km/h")
     
     # Get weather code description
-    weathercode = current.get('weathercode', None)
-    weather_description = "Unknown"
-    if weathercode == 0:
-        weather_description = "Clear sky"
-    elif weathercode in [1, 2, 3]:
-        weather_description = "Partly cloudy"
-    elif weathercode in [45, 48]:
-        weather_description = "Fog"
-    elif weathercode in range(51, 68):
-        weather_description = "Rain"
-    elif weathercode in range(71, 78):
-        weather_description = "Snow"
-    elif weathercode in range(80, 100):
-        weather_description = "Rain showers"
+    weather_description = classify_weathercode(current.get('weathercode')).description
     
     weather_table.add_row("Weather Condition", weather_description)
     
@@ -204,164 +1528,454 @@ def display_country_weather_info(country_data, weather_data):
     advice = get_weather_advice(weather_data)
     console.print(Panel(advice, title="Travel Advice", border_style="green"))
     
-    # Get and display travel advisory if available
-    if 'cca2' in country:
-        country_code = country['cca2']
-        advisory_data = get_travel_advisory(country_code)
+    # Display the forecast analysis alongside the advice
+    display_forecast_analytics(analyze_forecast(weather_data))
+    
+    # Display travel advisory if available
+    if advisory_data:
+        advisory_score = advisory_data.get('advisory', {}).get('score', 'N/A')
+        advisory_message = advisory_data.get('advisory', {}).get('message', 'No specific advisory message')
         
-        if advisory_data:
-            advisory_score = advisory_data.get('advisory', {}).get('score', 'N/A')
-            advisory_message = advisory_data.get('advisory', {}).get('message', 'No specific advisory message')
-            
-            # Create color based on advisory score
-            color = "green"
-            if advisory_score != 'N/A':
-                if advisory_score > 4:
-                    color = "red"
-                elif advisory_score > 2.5:
-                    color = "yellow"
-            
-            console.print(Panel(
-                f"Advisory Score: [bold {color}]{advisory_score}[/bold {color}] (lower is better)\n{advisory_message}",
-                title="Travel Advisory Information",
-                border_style=color
-            ))
-    
-    # Get and display holidays if available
-    if 'cca2' in country:
-        country_code = country['cca2']
-        holidays = get_holidays(country_code)
+        # Create color based on advisory score
+        color = "green"
+        if advisory_score != 'N/A':
+            if advisory_score > 4:
+                color = "red"
+            elif advisory_score > 2.5:
+                color = "yellow"
         
-        if holidays and len(holidays) > 0:
-            holiday_table = Table(title="Upcoming Public Holidays", box=box.ROUNDED, title_style="bold cyan")
-            holiday_table.add_column("Date", style="cyan")
-            holiday_table.add_column("Holiday", style="yellow")
-            holiday_table.add_column("Type", style="green")
-            
-            # Display up to 5 upcoming holidays
-            for holiday in holidays[:5]:
-                holiday_table.add_row(
-                    holiday.get('date', 'N/A'),
-                    holiday.get('name', 'N/A'),
-                    holiday.get('types', ['N/A'])[0] if holiday.get('types') else 'N/A'
-                )
-            
-            console.print(holiday_table)
+        console.print(Panel(
+            f"Advisory Score: [bold {color}]{advisory_score}[/bold {color}] (lower is better)\n{advisory_message}",
+            title="Travel Advisory Information",
+            border_style=color
+        ))
+    
+    # Display holidays if available
+    if holidays and len(holidays) > 0:
+        holiday_table = Table(title="Upcoming Public Holidays", box=box.ROUNDED, title_style="bold cyan")
+        holiday_table.add_column("Date", style="cyan")
+        holiday_table.add_column("Holiday", style="yellow")
+        holiday_table.add_column("Type", style="green")
+        
+        # Display up to 5 upcoming holidays
+        for holiday in holidays[:5]:
+            holiday_table.add_row(
+                holiday.get('date', 'N/A'),
+                holiday.get('name', 'N/A'),
+                holiday.get('types', ['N/A'])[0] if holiday.get('types') else 'N/A'
+            )
+        
+        console.print(holiday_table)
+
+# Function to compare weather across any number of locations.
+# Takes a list of country records and returns one row per location, best first.
+# `max_weather_age` is passed on to get_weather_many.
+def compare_locations(countries, max_weather_age=None):
+    countries = [country for country in countries if country]
+    if not countries:
+        return []
+
+    # One batched weather request for every location, advisories looked up alongside it
+    advisory_future = submit_fetch(get_travel_advisories, [country.cca2 for country in countries])
+    weather = get_weather_many([weather_location(country) for country in countries], max_weather_age)
+    advisories = wait_for_result(advisory_future, TRAVEL_ADVISORY_TIMEOUT, "Travel advisory service")
+    advisories = advisories or [None] * len(countries)
+
+    # Split everything into columns, then score each column in a single pass
+    current = [data.get("current_weather", {}) if data else {} for data in weather]
+    temperatures = [values.get("temperature") for values in current]
+    weathercodes = [values.get("weathercode") for values in current]
+    windspeeds = [values.get("windspeed") for values in current]
+    advisory_scores = [data.get("advisory", {}).get("score") if data else None for data in advisories]
 
-# Function to compare weather between two locations
-def compare_weather(location1_data, weather1_data, location2_data, weather2_data):
-    if not location1_data or not weather1_data or not location2_data or not weather2_data:
+    comfort = [1 - min(abs(t - COMFORT_TEMPERATURE) / COMFORT_RANGE, 1) if t is not None else 0.0
+               for t in temperatures]
+    severity = [1.0 if code is None else value for code, value in zip(weathercodes, weathercode_severities(weathercodes))]
+    wind = [min(w / WIND_LIMIT, 1) if w is not None else 1.0 for w in windspeeds]
+    risk = [a / 5 if a is not None else 0.5 for a in advisory_scores]
+    scores = [
+        COMPARE_WEIGHTS["comfort"] * c + COMPARE_WEIGHTS["weather"] * (1 - sv)
+        + COMPARE_WEIGHTS["wind"] * (1 - w) + COMPARE_WEIGHTS["advisory"] * (1 - r)
+        for c, sv, w, r in zip(comfort, severity, wind, risk)
+    ]
+
+    rows = [
+        {
+            "country": country,
+            "name": country.name or "N/A",
+            "weather": weather_data,
+            "temperature": temperature,
+            "weathercode": weathercode,
+            "windspeed": windspeed,
+            "advisory_score": advisory_score,
+            "score": round(score * 100, 1) if weather_data else None
+        }
+        for country, weather_data, temperature, weathercode, windspeed, advisory_score, score
+        in zip(countries, weather, temperatures, weathercodes, windspeeds, advisory_scores, scores)
+    ]
+    rows.sort(key=lambda row: row["score"] if row["score"] is not None else -1, reverse=True)
+    return rows
+
+# Function to display a comparison ranking from compare_locations
+@timed("travel_advisor_render_seconds", "view", "comparison")
+def display_comparison(rows):
+    if not rows:
         return
     
-    location1 = location1_data[0]["name"]["common"]
-    location2 = location2_data[0]["name"]["common"]
-    
-    console.print(f"\n[bold cyan]===== WEATHER COMPARISON: {location1} vs {location2} =====[/bold cyan]")
-    
-    # Create comparison table
-    comparison_table = Table(title=f"Weather Comparison", box=box.ROUNDED, title_style="bold cyan")
-    comparison_table.add_column("Metric", style="bold green")
-    comparison_table.add_column(location1, style="yellow")
-    comparison_table.add_column(location2, style="cyan")
-    comparison_table.add_column("Difference/Notes", style="magenta")
-    
-    # Temperature comparison
-    temp1 = weather1_data["current_weather"]["temperature"]
-    temp2 = weather2_data["current_weather"]["temperature"]
-    temp_diff = abs(temp1 - temp2)
-    
-    temp_note = ""
-    if temp1 > temp2:
-        temp_note = f"{location1} is warmer by {temp_diff:.1f}°C"
-    elif temp2 > temp1:
-        temp_note = f"{location2} is warmer by {temp_diff:.1f}°C"
-    else:
-        temp_note = "Same temperature"
-    
-    comparison_table.add_row("Temperature", f"{temp1}°C", f"{temp2}°C", temp_note)
-    
-    # Weather condition comparison
-    weathercode1 = weather1_data["current_weather"]["weathercode"]
-    weathercode2 = weather2_data["current_weather"]["weathercode"]
-    
-    # Get weather descriptions
-    weather_descriptions = {
-        0: "Clear sky",
-        1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-        45: "Fog", 48: "Depositing rime fog",
-        51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-        61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
-        71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
-        80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers"
-    }
-    
-    weather_desc1 = weather_descriptions.get(weathercode1, "Unknown")
-    weather_desc2 = weather_descriptions.get(weathercode2, "Unknown")
-    
-    weather_note = ""
-    if weathercode1 < weathercode2:  # Lower codes generally mean better weather
-        weather_note = f"{location1} has better conditions"
-    elif weathercode2 < weathercode1:
-        weather_note = f"{location2} has better conditions"
-    else:
-        weather_note = "Similar conditions"
-    
-    comparison_table.add_row("Weather", weather_desc1, weather_desc2, weather_note)
-    
-    # Wind comparison
-    wind1 = weather1_data["current_weather"]["windspeed"]
-    wind2 = weather2_data["current_weather"]["windspeed"]
-    wind_diff = abs(wind1 - wind2)
+    names = ", ".join(row["name"] for row in rows[:COMPARE_DETAIL_LIMIT])
+    if len(rows) > COMPARE_DETAIL_LIMIT:
+        names += f" and {len(rows) - COMPARE_DETAIL_LIMIT} more"
+    console.print(f"\n[bold cyan]===== WEATHER COMPARISON: {names} =====[/bold cyan]")
     
-    wind_note = ""
-    if wind1 > wind2:
-        wind_note = f"{location1} is windier by {wind_diff:.1f} km/h"
-    elif wind2 > wind1:
-        wind_note = f"{location2} is windier by {wind_diff:.1f} km/h"
-    else:
-        wind_note = "Same wind speed"
+    # Create comparison table, best location first
+    comparison_table = Table(title="Weather Comparison", box=box.ROUNDED, title_style="bold cyan")
+    comparison_table.add_column("Rank", style="bold green", justify="right")
+    comparison_table.add_column("Location", style="yellow")
+    comparison_table.add_column("Temperature", style="cyan")
+    comparison_table.add_column("Weather", style="cyan")
+    comparison_table.add_column("Wind Speed", style="cyan")
+    comparison_table.add_column("Advisory", style="magenta")
+    comparison_table.add_column("Score", style="bold green", justify="right")
     
-    comparison_table.add_row("Wind Speed", f"{wind1} km/h", f"{wind2} km/h", wind_note)
+    for rank, row in enumerate(rows, start=1):
+        comparison_table.add_row(
+            str(rank),
+            row["name"],
+            f"{row['temperature']}°C" if row["temperature"] is not None else "N/A",
+            classify_weathercode(row["weathercode"]).description,
+            f"{row['windspeed']} km/h" if row["windspeed"] is not None else "N/A",
+            str(row["advisory_score"]) if row["advisory_score"] is not None else "N/A",
+            str(row["score"]) if row["score"] is not None else "N/A"
+        )
     
     console.print(comparison_table)
     
     # Travel recommendation
-    if weathercode1 < weathercode2 and temp1 > 15 and temp1 < 30:
-        recommendation = f"[bold green]{location1}[/bold green] currently has better weather conditions for traveling."
-    elif weathercode2 < weathercode1 and temp2 > 15 and temp2 < 30:
-        recommendation = f"[bold green]{location2}[/bold green] currently has better weather conditions for traveling."
+    best = rows[0]
+    if best["score"] is None:
+        recommendation = "No weather data available to compare these locations."
+    elif len(rows) > 1 and best["score"] == rows[1]["score"]:
+        recommendation = "The top locations have [bold yellow]similar[/bold yellow] weather conditions for traveling."
     else:
-        if temp1 > 15 and temp1 < 30 and not (temp2 > 15 and temp2 < 30):
-            recommendation = f"[bold green]{location1}[/bold green] has more comfortable temperatures for traveling."
-        elif temp2 > 15 and temp2 < 30 and not (temp1 > 15 and temp1 < 30):
-            recommendation = f"[bold green]{location2}[/bold green] has more comfortable temperatures for traveling."
-        else:
-            recommendation = "Both locations have [bold yellow]similar[/bold yellow] weather conditions for traveling."
+        recommendation = f"[bold green]{best['name']}[/bold green] currently has the best weather conditions for traveling."
     
     console.print(Panel(recommendation, title="Travel Recommendation", border_style="green"))
     
-    # Add specific advice for each location
+    # Add specific advice and languages for the top locations
+    top_rows = rows[:COMPARE_DETAIL_LIMIT]
     console.print(Panel(
-        f"[bold yellow]{location1}:[/bold yellow] {get_weather_advice(weather1_data)}\n\n"
-        f"[bold cyan]{location2}:[/bold cyan] {get_weather_advice(weather2_data)}",
+        "\n\n".join(f"[bold yellow]{row['name']}:[/bold yellow] {get_weather_advice(row['weather'])}" for row in top_rows),
         title="Detailed Travel Advice",
         border_style="blue"
     ))
     
-    # Compare languages if available
-    if 'languages' in location1_data[0] and 'languages' in location2_data[0]:
-        languages1 = ", ".join(location1_data[0]['languages'].values())
-        languages2 = ", ".join(location2_data[0]['languages'].values())
-        
+    if all(row["country"].languages for row in top_rows):
         language_table = Table(title="Language Comparison", box=box.ROUNDED, title_style="bold cyan")
-        language_table.add_column(location1, style="yellow")
-        language_table.add_column(location2, style="cyan")
-        
-        language_table.add_row(languages1, languages2)
+        for row in top_rows:
+            language_table.add_column(row["name"], style="yellow")
+        language_table.add_row(*(", ".join(row["country"].languages) for row in top_rows))
         console.print(language_table)
 
+# Function to display how well the shared HTTP session reused its connections
+def display_connection_stats():
+    stats = get_connection_stats()
+    if not stats:
+        return
+    
+    stats_table = Table(title="Connection Reuse", box=box.ROUNDED, title_style="bold cyan")
+    stats_table.add_column("Host", style="bold green")
+    stats_table.add_column("Requests", style="yellow")
+    stats_table.add_column("Connections", style="yellow")
+    stats_table.add_column("Reused", style="cyan")
+    
+    for host, host_stats in sorted(stats.items()):
+        stats_table.add_row(host, str(host_stats["requests"]), str(host_stats["connections"]), str(host_stats["reused"]))
+    
+    console.print(stats_table)
+    
+    coalescing = get_coalescing_stats()
+    if coalescing:
+        coalescing_table = Table(title="Request Coalescing", box=box.ROUNDED, title_style="bold cyan")
+        coalescing_table.add_column("Endpoint", style="bold green")
+        coalescing_table.add_column("Upstream Calls", style="yellow")
+        coalescing_table.add_column("Coalesced", style="cyan")
+        for endpoint, counts in sorted(coalescing.items()):
+            coalescing_table.add_row(endpoint, str(counts["upstream"]), str(counts["coalesced"]))
+        console.print(coalescing_table)
+
+# Stages shown in a profile, by histogram name
+PROFILE_STAGES = {
+    "travel_advisor_helper_seconds": "helper",
+    "travel_advisor_upstream_seconds": "upstream",
+    "travel_advisor_render_seconds": "render",
+}
+
+# Function to work out what happened between two metrics snapshots, returns (stage rows, cache counts)
+def profile_between(before, after):
+    previous = {(h["name"], tuple(h["labels"].items())): h for h in before["histograms"]}
+    stages = []
+    for histogram in after["histograms"]:
+        if histogram["name"] not in PROFILE_STAGES:
+            continue
+        earlier = previous.get((histogram["name"], tuple(histogram["labels"].items())), {"count": 0, "sum": 0.0})
+        calls = histogram["count"] - earlier["count"]
+        if calls:
+            label = next(iter(histogram["labels"].values()))
+            stages.append((f"{PROFILE_STAGES[histogram['name']]}: {label}", calls, histogram["sum"] - earlier["sum"]))
+    
+    previous_counters = {(c["name"], tuple(c["labels"].items())): c["value"] for c in before["counters"]}
+    cache = {}
+    for counter in after["counters"]:
+        if counter["name"] != "travel_advisor_cache_requests_total":
+            continue
+        change = counter["value"] - previous_counters.get((counter["name"], tuple(counter["labels"].items())), 0)
+        if change:
+            cache[counter["labels"]["result"]] = cache.get(counter["labels"]["result"], 0) + change
+    return stages, cache
+
+# Function to display the per-stage latency breakdown since the `before` snapshot
+def display_profile(before, total_seconds):
+    stages, cache = profile_between(before, metrics.snapshot())
+    
+    profile_table = Table(title="Profile", box=box.ROUNDED, title_style="bold cyan")
+    profile_table.add_column("Stage", style="bold green")
+    profile_table.add_column("Calls", style="yellow", justify="right")
+    profile_table.add_column("Time (ms)", style="cyan", justify="right")
+    
+    for stage, calls, seconds in stages:
+        profile_table.add_row(stage, str(calls), f"{seconds * 1000:.1f}")
+    profile_table.add_row("[bold]total (wall clock)[/bold]", "", f"{total_seconds * 1000:.1f}")
+    
+    console.print(profile_table)
+    if cache:
+        console.print("Cache: " + ", ".join(f"{count} {result}" for result, count in sorted(cache.items())), style="dim")
+
+# Function to write all metrics to a file, as JSON for *.json paths and Prometheus text otherwise
+def write_metrics(path):
+    with open(path, "w", encoding="utf-8") as metrics_file:
+        metrics_file.write(metrics.to_json() if path.endswith(".json") else metrics.to_prometheus())
+
+# Function to resolve a query like "France", "country:France" or "capital:Paris" to one country record
+def resolve_query(query):
+    location_type, _, name = query.partition(":")
+    if not name:
+        location_type, name = None, query
+    location_type = location_type.strip().lower() if location_type else None
+    name = name.strip()
+
+    if location_type == "capital":
+        country_data = get_country_by_capital(name)
+    elif location_type == "country":
+        country_data = get_country_info(name)
+    else:
+        index = get_country_index()
+        if index:
+            country_data = index.find_by_name(name) or index.find_by_capital(name)
+        else:
+            country_data = get_country_info(name) or get_country_by_capital(name)
+    return country_data[0] if country_data else None
+
+# Function to turn a country record and its fetched details into plain JSON-ready data
+def build_lookup_record(country, details):
+    weather_data = details.get("weather")
+    advisory_data = details.get("advisory")
+    holidays = details.get("holidays") or []
+    return {
+        "country": {
+            "name": country.name,
+            "official_name": country.official_name,
+            "cca2": country.cca2,
+            "cca3": country.cca3,
+            "capital": list(country.capital),
+            "region": country.region,
+            "population": country.population,
+            "latlng": list(country.latlng),
+            "capital_latlng": list(country.capital_latlng),
+            "languages": list(country.languages),
+            "currencies": sorted(currency_code for currency_code, currency_name in country.currencies)
+        },
+        "weather": weather_data.get("current_weather") if weather_data else None,
+        "advice": get_weather_advice(weather_data) if weather_data else None,
+        "forecast": analyze_forecast(weather_data),
+        "advisory": {
+            "score": advisory_data.get("advisory", {}).get("score"),
+            "message": advisory_data.get("advisory", {}).get("message")
+        } if advisory_data else None,
+        "holidays": [
+            {"date": holiday.get("date"), "name": holiday.get("name")}
+            for holiday in holidays[:5]
+        ],
+        "timed_out": details.get("timed_out", [])
+    }
+
+# Function to look up one batch query, returns the JSON record to write for it
+def run_batch_query(line_number, query):
+    record = {"line": line_number, "query": query}
+    try:
+        country = resolve_query(query)
+        if not country:
+            record["status"] = "not_found"
+            return record
+        details = fetch_country_details([country])
+        record.update(build_lookup_record(country, details))
+        # Some panels were dropped because their service timed out
+        record["status"] = "partial" if details["timed_out"] else "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    return record
+
+# Function to run queries from `input_file` through a bounded pool, writing one JSON line per result
+# as soon as it finishes. At most `concurrency` queries are held in memory at once.
+def run_batch(input_file, output_file, concurrency=BATCH_CONCURRENCY):
+    queries = (
+        (line_number, line.strip())
+        for line_number, line in enumerate(input_file, start=1)
+        if line.strip() and not line.lstrip().startswith("#")
+    )
+    counts = {"ok": 0, "partial": 0, "not_found": 0, "error": 0}
+
+    def write(future):
+        record = future.result()
+        counts[record["status"]] += 1
+        output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output_file.flush()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as batch_pool:
+        in_flight = set()
+        for line_number, query in queries:
+            if len(in_flight) >= concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future)
+            in_flight.add(batch_pool.submit(run_batch_query, line_number, query))
+        for future in wait(in_flight).done:
+            write(future)
+
+    return counts
+
+# One watched location: the query it came from, its country record and its refresh interval (seconds)
+WatchEntry = namedtuple("WatchEntry", ["query", "country", "interval"])
+
+# Column widths of the watch table
+WATCH_COLUMNS = (("Location", 16), ("Temp", 7), ("Weather", 18), ("Wind", 10), ("Advisory", 8),
+                 ("Score", 5), ("Updated", 8))
+
+# Function to fit a value into a fixed-width column, followed by the space separating columns
+def watch_cell(value, width):
+    value = str(value)
+    if len(value) > width:
+        value = value[:width - 1] + "…"
+    return value.ljust(width) + " "
+
+# Function to build one line of the watch table from a row's values
+def watch_row_text(values):
+    name, temperature, weathercode, windspeed, advisory_score, score, updated = values
+    cells = (
+        (name, "yellow"),
+        (f"{temperature}°C" if temperature is not None else "N/A", "cyan"),
+        (classify_weathercode(weathercode).description if weathercode is not None else "N/A", "cyan"),
+        (f"{windspeed} km/h" if windspeed is not None else "N/A", "cyan"),
+        (advisory_score if advisory_score is not None else "N/A", "magenta"),
+        (score if score is not None else "N/A", "bold green"),
+        (updated, "dim")
+    )
+    text = Text(no_wrap=True, overflow="crop")
+    for (value, style), (_, width) in zip(cells, WATCH_COLUMNS):
+        text.append(watch_cell(value, width), style=style)
+    return text
+
+# Renderable for the watch table. Each row's rendered line is kept, and only rows whose values
+# changed since the last refresh (or every row after the terminal is resized) are rendered again.
+class WatchView:
+    def __init__(self, names):
+        self.rows = [(name, None, None, None, None, None, "-") for name in names]
+        self.rendered = [None] * len(names)
+        self.header = None
+        self.width = None
+
+    # Returns True when the row changed and the view needs a refresh
+    def update(self, position, values):
+        if self.rows[position][:-1] == values:
+            return False
+        self.rows[position] = values + (datetime.datetime.now().strftime("%H:%M:%S"),)
+        self.rendered[position] = None
+        return True
+
+    def __rich_console__(self, console, options):
+        options = options.update(height=1)
+        if options.max_width != self.width:
+            self.width = options.max_width
+            self.rendered = [None] * len(self.rows)
+            header = Text(no_wrap=True, overflow="crop", style="bold cyan")
+            for title, width in WATCH_COLUMNS:
+                header.append(watch_cell(title, width))
+            self.header = console.render_lines(header, options, pad=True)[0]
+
+        yield from self.header
+        yield Segment.line()
+        for position, values in enumerate(self.rows):
+            if self.rendered[position] is None:
+                self.rendered[position] = console.render_lines(watch_row_text(values), options, pad=True)[0]
+                metrics.increment("travel_advisor_watch_rows_rendered_total", {})
+            yield from self.rendered[position]
+            yield Segment.line()
+
+# Function to read a watchlist: one query per line like batch mode, optionally followed by
+# "@SECONDS" to give that location its own refresh interval. Returns (query, interval) pairs.
+def read_watchlist(watchlist_file, default_interval=WATCH_INTERVAL):
+    watchlist = []
+    for line in watchlist_file:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        query, _, interval = line.partition("@")
+        try:
+            watchlist.append((query.strip(), max(1.0, float(interval)) if interval.strip() else default_interval))
+        except ValueError:
+            console.print(f"[bold yellow]Warning:[/bold yellow] Ignoring '{line}', the interval must be a number of seconds")
+    return watchlist
+
+# Function to refresh the watched locations at `positions`, returns True when any row changed.
+# All of them share one batched weather request and one advisory lookup. Cached weather is only
+# reused while it is younger than the shortest interval among them, so every due location is fetched again.
+def refresh_watch(view, entries, positions):
+    max_age = min(entries[position].interval for position in positions)
+    rows = compare_locations([entries[position].country for position in positions], max_age)
+    by_country = {id(row["country"]): row for row in rows}
+    changed = False
+    for position in positions:
+        row = by_country.get(id(entries[position].country))
+        if row is None or row["weather"] is None:
+            # Keep showing the last values we had rather than blanking the row
+            continue
+        values = (row["name"], row["temperature"], row["weathercode"], row["windspeed"],
+                  row["advisory_score"], row["score"])
+        changed = view.update(position, values) or changed
+    return changed
+
+# Function to keep the watch table on screen, refreshing each location when its interval is up
+def watch(entries):
+    view = WatchView([entry.country.name or entry.query for entry in entries])
+    schedule = [(0.0, position) for position in range(len(entries))]
+    
+    with Live(view, console=console.load(), auto_refresh=False) as live:
+        while True:
+            now = time.monotonic()
+            due = []
+            while schedule and schedule[0][0] <= now:
+                due.append(heapq.heappop(schedule)[1])
+            if due:
+                if refresh_watch(view, entries, due):
+                    live.refresh()
+                # Count from the end of the refresh, so the next one finds the cached weather a full interval old
+                refreshed = time.monotonic()
+                for position in due:
+                    heapq.heappush(schedule, (refreshed + entries[position].interval, position))
+            time.sleep(max(0.0, min(schedule[0][0] - time.monotonic(), WATCH_MAX_SLEEP)))
+
 # Main menu function
-def main_menu():
+def main_menu(profile=False):
     while True:
         console.clear()
         console.print(Panel.fit(
@@ -372,7 +1986,7 @@ def main_menu():
         ))
         
         console.print("[bold green]1.[/bold green] Get Country/City Information and Weather")
-        console.print("[bold green]2.[/bold green] Compare Weather Between Two Locations")
+        console.print("[bold green]2.[/bold green] Compare Weather Between Locations")
         console.print("[bold green]3.[/bold green] Exit")
         
         choice = Prompt.ask("\nEnter your choice", choices=["1", "2", "3"], default="1")
@@ -383,6 +1997,7 @@ def main_menu():
             
             location_type = Prompt.ask("Search by country name or capital city?", choices=["country", "capital"], default="country")
             location_name = Prompt.ask("Enter the name")
+            profile_start, profile_started = metrics.snapshot(), time.perf_counter()
             
             with console.status(f"[bold green]Searching for {location_name}...[/bold green]"):
                 country_data = None
@@ -392,67 +2007,42 @@ def main_menu():
                     country_data = get_country_by_capital(location_name)
                 
                 if country_data:
-                    # Get coordinates for weather data
-                    lat = country_data[0]["latlng"][0]
-                    lon = country_data[0]["latlng"][1]
-                    
-                    # Get weather data
-                    weather_data = get_weather(lat, lon)
+                    # Fetch weather, travel advisory and holidays concurrently
+                    details = fetch_country_details(country_data)
                     
                     # Display information
                     console.clear()
-                    display_country_weather_info(country_data, weather_data)
+                    display_country_weather_info(country_data, details["weather"],
+                                                 details["advisory"], details["holidays"])
+            
+            if profile:
+                display_profile(profile_start, time.perf_counter() - profile_started)
             
         elif choice == "2":
             console.clear()
-            console.print(Panel("Compare Weather Between Two Locations", border_style="cyan"))
+            console.print(Panel("Compare Weather Between Locations", border_style="cyan"))
             
-            console.print("[bold yellow]First location:[/bold yellow]")
-            location1_type = Prompt.ask("Search by country name or capital city?", choices=["country", "capital"], default="country")
-            location1_name = Prompt.ask("Enter the name")
-            
-            with console.status(f"[bold green]Searching for {location1_name}...[/bold green]"):
-                location1_data = None
-                if location1_type == "country":
-                    location1_data = get_country_info(location1_name)
-                elif location1_type == "capital":
-                    location1_data = get_country_by_capital(location1_name)
-                
-                if not location1_data:
-                    console.print("[bold red]Could not find the first location. Please try again.[/bold red]")
-                    continue
-            
-            console.print("\n[bold cyan]Second location:[/bold cyan]")
-            location2_type = Prompt.ask("Search by country name or capital city?", choices=["country", "capital"], default="country")
-            location2_name = Prompt.ask("Enter the name")
-            
-            with console.status(f"[bold green]Searching for {location2_name}...[/bold green]"):
-                location2_data = None
-                if location2_type == "country":
-                    location2_data = get_country_info(location2_name)
-                elif location2_type == "capital":
-                    location2_data = get_country_by_capital(location2_name)
-                
-                if not location2_data:
-                    console.print("[bold red]Could not find the second location. Please try again.[/bold red]")
-                    continue
+            location_type = Prompt.ask("Search by country name or capital city?", choices=["country", "capital"], default="country")
+            location_names = [name.strip() for name in Prompt.ask("Enter the names, separated by commas").split(",") if name.strip()]
+            profile_start, profile_started = metrics.snapshot(), time.perf_counter()
             
             with console.status("[bold green]Getting weather data and comparing...[/bold green]"):
-                # Get coordinates for weather data
-                lat1 = location1_data[0]["latlng"][0]
-                lon1 = location1_data[0]["latlng"][1]
-                lat2 = location2_data[0]["latlng"][0]
-                lon2 = location2_data[0]["latlng"][1]
-                
-                # Get weather data
-                weather1_data = get_weather(lat1, lon1)
-                weather2_data = get_weather(lat2, lon2)
-                
+                lookup = get_country_info if location_type == "country" else get_country_by_capital
+                countries = [data[0] for data in fetch_pool.map(lookup, location_names) if data]
+                rows = compare_locations(countries)
+            
+            if len(rows) < 2:
+                console.print("[bold red]Need at least two locations to compare. Please try again.[/bold red]")
+            else:
                 # Compare weather
                 console.clear()
-                compare_weather(location1_data, weather1_data, location2_data, weather2_data)
+                display_comparison(rows)
+            
+            if profile:
+                display_profile(profile_start, time.perf_counter() - profile_started)
             
         elif choice == "3":
+            display_connection_stats()
             console.print(Panel("Thank you for using the Travel & Weather Advisor. Goodbye!", 
                                border_style="green"))
             sys.exit(0)
@@ -460,8 +2050,366 @@ def main_menu():
         console.print("\nPress Enter to continue...", style="bold")
         input()
 
+# Function to turn a comparison row into plain JSON-ready data
+def build_comparison_record(rank, row):
+    return {
+        "rank": rank,
+        "name": row["name"],
+        "cca2": row["country"].cca2,
+        "temperature": row["temperature"],
+        "weathercode": row["weathercode"],
+        "weather": classify_weathercode(row["weathercode"]).description,
+        "windspeed": row["windspeed"],
+        "advisory_score": row["advisory_score"],
+        "score": row["score"]
+    }
+
+# Function to look up a location given as ?name=...&type=country|capital, returns a country record or None
+def resolve_api_location(params):
+    name = params.get("name", "").strip()
+    location_type = params.get("type", "").strip()
+    if not name:
+        return None
+    return resolve_query(f"{location_type}:{name}" if location_type else name)
+
+# GET /country?name=France[&type=country|capital]
+def api_country(params):
+    if not params.get("name"):
+        return 400, {"error": "missing 'name' parameter"}
+    country = resolve_api_location(params)
+    if not country:
+        return 404, {"error": f"no country found for '{params['name']}'"}
+    return 200, build_lookup_record(country, fetch_country_details([country]))
+
+# Function to turn a (distance_km, place) pair from the spatial index into plain JSON-ready data
+def build_place_record(distance_km, place):
+    return {
+        "kind": place.kind,
+        "name": place.name,
+        "country": place.country.name,
+        "cca2": place.country.cca2,
+        "latitude": place.latitude,
+        "longitude": place.longitude,
+        "distance_km": round(distance_km, 1)
+    }
+
+# Function to read ?lat=...&lon=..., returns (latitude, longitude) or None when they are not valid
+def parse_api_coordinates(params):
+    try:
+        latitude, longitude = float(params["lat"]), float(params["lon"])
+    except (KeyError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+# GET /weather?lat=48.85&lon=2.35 or /weather?name=France[&type=country|capital]
+def api_weather(params):
+    location = None
+    nearest = None
+    if "lat" in params and "lon" in params:
+        coordinates = parse_api_coordinates(params)
+        if not coordinates:
+            return 400, {"error": "'lat' and 'lon' must be valid coordinates"}
+        latitude, longitude = coordinates
+        index = get_country_index()
+        matches = index.nearest(latitude, longitude) if index else []
+        if matches:
+            nearest = build_place_record(*matches[0])
+    elif params.get("name"):
+        country = resolve_api_location(params)
+        if not country:
+            return 404, {"error": f"no country found for '{params['name']}'"}
+        location = country.name
+        latitude, longitude = weather_location(country)
+    else:
+        return 400, {"error": "pass either 'lat' and 'lon' or 'name'"}
+
+    weather_data = get_weather(latitude, longitude)
+    if not weather_data:
+        return 502, {"error": "weather service unavailable"}
+    return 200, {
+        "location": location,
+        "latitude": latitude,
+        "longitude": longitude,
+        "nearest": nearest,
+        "weather": weather_data.get("current_weather"),
+        "advice": get_weather_advice(weather_data),
+        "forecast": analyze_forecast(weather_data)
+    }
+
+# GET /compare?names=France,Japan,Peru[&type=country|capital]
+def api_compare(params):
+    names = [name.strip() for name in params.get("names", "").split(",") if name.strip()]
+    if len(names) < 2:
+        return 400, {"error": "pass at least two comma-separated 'names'"}
+    if len(names) > COMPARE_MAX_LOCATIONS:
+        return 400, {"error": f"at most {COMPARE_MAX_LOCATIONS} locations can be compared"}
+
+    location_type = params.get("type", "").strip()
+    queries = [f"{location_type}:{name}" if location_type else name for name in names]
+    countries = list(fetch_pool.map(resolve_query, queries))
+    rows = compare_locations(countries)
+    return 200, {
+        "locations": [build_comparison_record(rank, row) for rank, row in enumerate(rows, start=1)],
+        "not_found": [name for name, country in zip(names, countries) if not country]
+    }
+
+# GET /nearest?lat=48.85&lon=2.35[&count=5] or /nearest?lat=48.85&lon=2.35&radius=500 (km)
+def api_nearest(params):
+    coordinates = parse_api_coordinates(params)
+    if not coordinates:
+        return 400, {"error": "pass valid 'lat' and 'lon' coordinates"}
+    latitude, longitude = coordinates
+    try:
+        count = min(max(1, int(params.get("count", 1))), NEAREST_MAX_RESULTS)
+        radius = float(params["radius"]) if params.get("radius") else None
+    except ValueError:
+        return 400, {"error": "'count' and 'radius' must be numbers"}
+    if radius is not None and not radius >= 0:
+        return 400, {"error": "'radius' must be a non-negative number"}
+    
+    index = get_country_index()
+    if not index:
+        return 502, {"error": "country list unavailable"}
+    if radius is not None:
+        matches = index.within(latitude, longitude, radius)[:NEAREST_MAX_RESULTS]
+    else:
+        matches = index.nearest(latitude, longitude, count)
+    return 200, {
+        "latitude": latitude,
+        "longitude": longitude,
+        "places": [build_place_record(distance_km, place) for distance_km, place in matches]
+    }
+
+# GET /holidays?countries=FR,Japan[&start=2026-12-01&end=2027-01-15]
+def api_holidays(params):
+    names = [name.strip() for name in params.get("countries", "").split(",") if name.strip()]
+    if not names:
+        return 400, {"error": "pass comma-separated 'countries'"}
+    try:
+        start = datetime.date.fromisoformat(params["start"]) if params.get("start") else datetime.date.today()
+        end = datetime.date.fromisoformat(params["end"]) if params.get("end") else start + datetime.timedelta(days=HOLIDAY_QUERY_DAYS)
+    except ValueError:
+        return 400, {"error": "'start' and 'end' must be YYYY-MM-DD dates"}
+    if end < start:
+        return 400, {"error": "'end' must not be before 'start'"}
+    if end.year - start.year + 1 > HOLIDAY_QUERY_MAX_YEARS:
+        return 400, {"error": f"'start' and 'end' may span at most {HOLIDAY_QUERY_MAX_YEARS} calendar years"}
+
+    countries = [resolve_query(name) for name in names]
+    country_codes = [country.cca2 for country in countries if country and country.cca2]
+    return 200, {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "holidays": [
+            {"country": country_code, "date": holiday.get("date"), "name": holiday.get("name")}
+            for country_code, holiday in holiday_index.holidays_between(country_codes, start, end)
+        ],
+        "long_weekends": {
+            country_code: holiday_index.long_weekends(country_code, start, end) for country_code in country_codes
+        },
+        "not_found": [name for name, country in zip(names, countries) if not country]
+    }
+
+# GET /health
+def api_health(params):
+    return 200, {"status": "ok"}
+
+# GET /metrics (Prometheus text) or /metrics?format=json
+def api_metrics(params):
+    if params.get("format") == "json":
+        return 200, metrics.snapshot()
+    return 200, metrics.to_prometheus()
+
+# GET /stats
+def api_stats(params):
+    return 200, {"connections": get_connection_stats(), "coalescing": get_coalescing_stats()}
+
+API_ROUTES = {
+    "/country": api_country,
+    "/weather": api_weather,
+    "/compare": api_compare,
+    "/holidays": api_holidays,
+    "/health": api_health,
+    "/stats": api_stats,
+    "/metrics": api_metrics,
+    "/nearest": api_nearest,
+}
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                500: "Internal Server Error", 502: "Bad Gateway"}
+
+# Function to run one API request, returns (status, payload)
+def handle_api_request(method, target):
+    url = urlsplit(target)
+    handler = API_ROUTES.get(url.path.rstrip("/") or "/")
+    if handler is None:
+        return 404, {"error": f"unknown endpoint '{url.path}'"}
+    if method != "GET":
+        return 405, {"error": "only GET is supported"}
+    params = {key: values[0] for key, values in parse_qs(url.query).items()}
+    try:
+        return handler(params)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {method} {target} failed: {e}")
+        return 500, {"error": "internal error"}
+
+# Function to serve HTTP/1.1 requests on one client connection until it closes or goes idle.
+# Lookups run on a worker pool so the event loop keeps accepting other clients meanwhile.
+async def handle_api_connection(reader, writer, server_pool):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            request_line = await asyncio.wait_for(reader.readline(), SERVER_IDLE_TIMEOUT)
+            if not request_line.strip():
+                break
+            method, target, version = request_line.decode("latin-1").split()
+            
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if headers.get("content-length"):
+                await reader.readexactly(int(headers["content-length"]))
+            
+            status, payload = await loop.run_in_executor(server_pool, handle_api_request, method, target)
+            
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+            if isinstance(payload, str):
+                body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+            writer.write(
+                f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+# Function to run the JSON API server until it is stopped
+async def run_api_server(host, port):
+    with ThreadPoolExecutor(max_workers=SERVER_WORKERS, thread_name_prefix="api") as server_pool:
+        server = await asyncio.start_server(
+            lambda reader, writer: handle_api_connection(reader, writer, server_pool),
+            host, port, backlog=1024
+        )
+        console.print(f"Serving the Travel & Weather Advisor API on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+# Function to parse the command line
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Travel & Weather Advisor")
+    parser.add_argument("--upstream", help="base URL serving all four APIs, e.g. a local mock_upstream.py")
+    parser.add_argument("--profile", action="store_true", help="print a per-stage latency breakdown after each lookup")
+    parser.add_argument("--metrics-out", help="write metrics on exit, as JSON for *.json files, Prometheus text otherwise")
+    commands = parser.add_subparsers(dest="command")
+    
+    commands.add_parser("update-countries", help="save the full country list for offline lookups")
+    
+    batch_parser = commands.add_parser("batch", help="look up queries from a file and write JSON Lines results")
+    batch_parser.add_argument("--input", default="-",
+                              help="file with one query per line, e.g. 'France' or 'capital:Paris' (default: stdin)")
+    batch_parser.add_argument("--output", default="-", help="file to write JSON Lines results to (default: stdout)")
+    batch_parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                              help=f"queries in flight at once (default: {BATCH_CONCURRENCY})")
+    
+    serve_parser = commands.add_parser("serve", help="serve country, weather and comparison lookups as a JSON API")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    
+    watch_parser = commands.add_parser("watch", help="keep a live table of weather and advisories for a watchlist")
+    watch_parser.add_argument("--input", default="-",
+                              help="file with one query per line, optionally followed by '@SECONDS' (default: stdin)")
+    watch_parser.add_argument("--interval", type=float, default=WATCH_INTERVAL,
+                              help=f"seconds between refreshes of a location without its own interval (default: {WATCH_INTERVAL})")
+    
+    return parser.parse_args(argv)
+
+# Function for the batch command
+def batch_command(args):
+    profile_start, profile_started = metrics.snapshot(), time.perf_counter()
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        counts = run_batch(input_file, output_file, max(1, args.concurrency))
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    console.print(f"Done: {counts['ok']} found, {counts['partial']} partial, {counts['not_found']} not found, "
+                  f"{counts['error']} failed")
+    if args.profile:
+        display_profile(profile_start, time.perf_counter() - profile_started)
+    return 0 if counts["error"] == 0 else 1
+
+# Function for the watch command
+def watch_command(args):
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        watchlist = read_watchlist(input_file, max(1.0, args.interval))
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+    
+    countries = list(fetch_pool.map(resolve_query, [query for query, interval in watchlist]))
+    entries = []
+    for (query, interval), country in zip(watchlist, countries):
+        if country:
+            entries.append(WatchEntry(query, country, interval))
+        else:
+            console.print(f"[bold yellow]Warning:[/bold yellow] Not watching '{query}', no country found")
+    if not entries:
+        console.print("[bold red]Error:[/bold red] Nothing to watch")
+        return 1
+    
+    console.print(f"[bold cyan]Watching {len(entries)} locations, press Ctrl+C to stop[/bold cyan]")
+    try:
+        watch(entries)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
 # Run the application
 if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.upstream:
+        set_upstream(args.upstream)
+    if args.metrics_out:
+        atexit.register(write_metrics, args.metrics_out)
+    
+    if args.command == "update-countries":
+        sys.exit(0 if save_country_snapshot() else 1)
+    
+    if args.command == "batch":
+        # Keep stdout for results only, warnings and the summary go to stderr
+        console = PlainConsole()
+        sys.exit(batch_command(args))
+    
+    if args.command == "watch":
+        sys.exit(watch_command(args))
+    
+    if args.command == "serve":
+        console = PlainConsole()
+        try:
+            asyncio.run(run_api_server(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+    
     console.clear()
     console.print(Panel.fit(
         "[bold cyan]Welcome to the Travel & Weather Advisor![/bold cyan]\n\n"
@@ -471,10 +2419,6 @@ if __name__ == "__main__":
         padding=(1, 2)
     ))
     
-    # Disable SSL warnings that might appear due to verify=False
-    import urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    
     console.print("\nPress Enter to start...", style="bold")
     input()
-    main_menu()
\ No newline at end of file
+    main_menu(profile=args.profile)
\ No newline at end of file
@@ -0,0 +1,312 @@
+import argparse
+import datetime
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Deterministic local stand-in for restcountries, Open-Meteo, travel-advisory.info and Nager.Date.
+# Point the advisor at it with: python main.py --upstream http://127.0.0.1:8700 ...
+# Latency and errors can be injected per service to rehearse slow or flaky upstreams.
+
+# Path prefixes for each fake service, matching set_upstream() in main.py
+RESTCOUNTRIES_PATH = "/restcountries/v3.1"
+OPEN_METEO_PATH = "/open-meteo/v1/forecast"
+TRAVEL_ADVISORY_PATH = "/travel-advisory/api"
+NAGER_DATE_PATH = "/nager/api/v3"
+
+FORECAST_HOURS = 7 * 24
+
+# Service names, matching the endpoint names main.py uses for caching
+SERVICES = ("restcountries", "open_meteo", "travel_advisory", "nager_date")
+
+# Small fixed set of countries in restcountries v3.1 format
+COUNTRIES = [
+    {"name": {"common": "France", "official": "French Republic"}, "capital": ["Paris"],
+     "capitalInfo": {"latlng": [48.87, 2.33]}, "region": "Europe", "population": 67391582,
+     "latlng": [46.0, 2.0], "cca2": "FR", "cca3": "FRA", "languages": {"fra": "French"},
+     "currencies": {"EUR": {"name": "Euro", "symbol": "€"}}, "altSpellings": ["FR", "French Republic"]},
+    {"name": {"common": "Germany", "official": "Federal Republic of Germany"}, "capital": ["Berlin"],
+     "capitalInfo": {"latlng": [52.52, 13.4]}, "region": "Europe", "population": 83240525,
+     "latlng": [51.0, 9.0], "cca2": "DE", "cca3": "DEU", "languages": {"deu": "German"},
+     "currencies": {"EUR": {"name": "Euro", "symbol": "€"}}, "altSpellings": ["DE", "Deutschland"]},
+    {"name": {"common": "Iceland", "official": "Iceland"}, "capital": ["Reykjavik"],
+     "capitalInfo": {"latlng": [64.15, -21.95]}, "region": "Europe", "population": 366425,
+     "latlng": [65.0, -18.0], "cca2": "IS", "cca3": "ISL", "languages": {"isl": "Icelandic"},
+     "currencies": {"ISK": {"name": "Icelandic króna", "symbol": "kr"}}, "altSpellings": ["IS", "Ísland"]},
+    {"name": {"common": "Japan", "official": "Japan"}, "capital": ["Tokyo"],
+     "capitalInfo": {"latlng": [35.68, 139.75]}, "region": "Asia", "population": 125836021,
+     "latlng": [36.0, 138.0], "cca2": "JP", "cca3": "JPN", "languages": {"jpn": "Japanese"},
+     "currencies": {"JPY": {"name": "Japanese yen", "symbol": "¥"}}, "altSpellings": ["JP", "Nippon"]},
+    {"name": {"common": "India", "official": "Republic of India"}, "capital": ["New Delhi"],
+     "capitalInfo": {"latlng": [28.6, 77.2]}, "region": "Asia", "population": 1380004385,
+     "latlng": [20.0, 77.0], "cca2": "IN", "cca3": "IND", "languages": {"eng": "English", "hin": "Hindi"},
+     "currencies": {"INR": {"name": "Indian rupee", "symbol": "₹"}}, "altSpellings": ["IN", "Bhārat"]},
+    {"name": {"common": "Egypt", "official": "Arab Republic of Egypt"}, "capital": ["Cairo"],
+     "capitalInfo": {"latlng": [30.05, 31.25]}, "region": "Africa", "population": 102334403,
+     "latlng": [27.0, 30.0], "cca2": "EG", "cca3": "EGY", "languages": {"ara": "Arabic"},
+     "currencies": {"EGP": {"name": "Egyptian pound", "symbol": "£"}}, "altSpellings": ["EG", "Misr"]},
+    {"name": {"common": "Kenya", "official": "Republic of Kenya"}, "capital": ["Nairobi"],
+     "capitalInfo": {"latlng": [-1.28, 36.82]}, "region": "Africa", "population": 53771300,
+     "latlng": [1.0, 38.0], "cca2": "KE", "cca3": "KEN", "languages": {"eng": "English", "swa": "Swahili"},
+     "currencies": {"KES": {"name": "Kenyan shilling", "symbol": "Sh"}}, "altSpellings": ["KE", "Jamhuri ya Kenya"]},
+    {"name": {"common": "Brazil", "official": "Federative Republic of Brazil"}, "capital": ["Brasília"],
+     "capitalInfo": {"latlng": [-15.79, -47.88]}, "region": "Americas", "population": 212559409,
+     "latlng": [-10.0, -55.0], "cca2": "BR", "cca3": "BRA", "languages": {"por": "Portuguese"},
+     "currencies": {"BRL": {"name": "Brazilian real", "symbol": "R$"}}, "altSpellings": ["BR", "Brasil"]},
+    {"name": {"common": "Peru", "official": "Republic of Peru"}, "capital": ["Lima"],
+     "capitalInfo": {"latlng": [-12.05, -77.05]}, "region": "Americas", "population": 32971846,
+     "latlng": [-10.0, -76.0], "cca2": "PE", "cca3": "PER", "languages": {"spa": "Spanish"},
+     "currencies": {"PEN": {"name": "Peruvian sol", "symbol": "S/ "}}, "altSpellings": ["PE", "Perú"]},
+    {"name": {"common": "Canada", "official": "Canada"}, "capital": ["Ottawa"],
+     "capitalInfo": {"latlng": [45.42, -75.7]}, "region": "Americas", "population": 38005238,
+     "latlng": [60.0, -95.0], "cca2": "CA", "cca3": "CAN", "languages": {"eng": "English", "fra": "French"},
+     "currencies": {"CAD": {"name": "Canadian dollar", "symbol": "$"}}, "altSpellings": ["CA"]},
+    {"name": {"common": "United States", "official": "United States of America"}, "capital": ["Washington, D.C."],
+     "capitalInfo": {"latlng": [38.89, -77.05]}, "region": "Americas", "population": 329484123,
+     "latlng": [38.0, -97.0], "cca2": "US", "cca3": "USA", "languages": {"eng": "English"},
+     "currencies": {"USD": {"name": "United States dollar", "symbol": "$"}}, "altSpellings": ["US", "USA"]},
+    {"name": {"common": "Australia", "official": "Commonwealth of Australia"}, "capital": ["Canberra"],
+     "capitalInfo": {"latlng": [-35.27, 149.13]}, "region": "Oceania", "population": 25687041,
+     "latlng": [-27.0, 133.0], "cca2": "AU", "cca3": "AUS", "languages": {"eng": "English"},
+     "currencies": {"AUD": {"name": "Australian dollar", "symbol": "$"}}, "altSpellings": ["AU"]},
+]
+
+# Month and day of each country's national day, used for the fake holiday calendars
+NATIONAL_DAYS = {
+    "FR": (7, 14), "DE": (10, 3), "IS": (6, 17), "JP": (2, 11), "IN": (1, 26), "EG": (7, 23),
+    "KE": (12, 12), "BR": (9, 7), "PE": (7, 28), "CA": (7, 1), "US": (7, 4), "AU": (1, 26),
+}
+
+WEATHERCODES = [0, 1, 2, 3, 45, 51, 61, 63, 71, 80, 95]
+
+# Function to get a stable pseudo-random number in [0, 1) for a key
+def stable_random(key):
+    return (zlib.crc32(key.encode()) % 10000) / 10000
+
+# Function to keep only the requested restcountries fields
+def project(country, fields):
+    if not fields:
+        return country
+    return {field: country[field] for field in fields if field in country}
+
+# Function to build a fake Open-Meteo response for one coordinate. With timezone=auto the
+# times are local, using a whole-hour offset worked out from the longitude.
+def fake_weather(latitude, longitude, timezone=None):
+    base = 30 - abs(latitude) * 0.5 + stable_random(f"{latitude},{longitude}") * 8
+    offset_hours = round(longitude / 15) if timezone == "auto" else 0
+    local_now = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=offset_hours)
+    start = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+    times, temperatures, precipitation, weathercodes = [], [], [], []
+    for hour in range(FORECAST_HOURS):
+        moment = start + datetime.timedelta(hours=hour)
+        times.append(moment.strftime("%Y-%m-%dT%H:%M"))
+        temperatures.append(round(base + 5 * math.sin(2 * math.pi * (hour - 9) / 24), 1))
+        chance = stable_random(f"{latitude},{longitude},{hour // 3}")
+        precipitation.append(int(chance * 100))
+        weathercodes.append(WEATHERCODES[int(chance * len(WEATHERCODES))])
+    now = local_now.hour
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "utc_offset_seconds": offset_hours * 3600,
+        "timezone": f"Etc/GMT{-offset_hours:+d}" if offset_hours else "GMT",
+        "timezone_abbreviation": f"GMT{offset_hours:+d}" if offset_hours else "GMT",
+        "current_weather": {
+            "time": times[now],
+            "temperature": temperatures[now],
+            "windspeed": round(5 + stable_random(f"wind {latitude},{longitude}") * 30, 1),
+            "winddirection": int(stable_random(f"direction {latitude},{longitude}") * 360),
+            "weathercode": weathercodes[now]
+        },
+        "hourly": {
+            "time": times,
+            "temperature_2m": temperatures,
+            "precipitation_probability": precipitation,
+            "weathercode": weathercodes
+        }
+    }
+
+# Function to build a fake travel advisory entry for one country
+def fake_advisory(country):
+    score = round(1 + stable_random(f"advisory {country['cca2']}") * 4, 1)
+    return {
+        "iso_alpha2": country["cca2"],
+        "name": country["name"]["common"],
+        "continent": country["region"],
+        "advisory": {
+            "score": score,
+            "sources_active": 5,
+            "message": f"{country['name']['common']} has a current risk level of {score} (out of 5).",
+            "updated": datetime.date.today().isoformat() + " 00:00:00",
+            "source": "https://www.travel-advisory.info/"
+        }
+    }
+
+# Function to build a fake public holiday list for one country and year
+def fake_holidays(country_code, year):
+    month, day = NATIONAL_DAYS[country_code]
+    holidays = [
+        (datetime.date(year, 1, 1), "New Year's Day"),
+        (datetime.date(year, 5, 1), "Labour Day"),
+        (datetime.date(year, month, day), "National Day"),
+        (datetime.date(year, 12, 25), "Christmas Day"),
+    ]
+    return [
+        {"date": date.isoformat(), "localName": name, "name": name, "countryCode": country_code,
+         "fixed": True, "global": True, "counties": None, "launchYear": None, "types": ["Public"]}
+        for date, name in sorted(holidays)
+    ]
+
+# Request handler that serves every fake endpoint
+class MockUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        path = unquote(url.path)
+
+        if path.startswith(RESTCOUNTRIES_PATH):
+            service = "restcountries"
+        elif path == OPEN_METEO_PATH:
+            service = "open_meteo"
+        elif path == TRAVEL_ADVISORY_PATH:
+            service = "travel_advisory"
+        elif path.startswith(NAGER_DATE_PATH + "/PublicHolidays/"):
+            service = "nager_date"
+        else:
+            self.send_json(404, {"message": "Not Found"})
+            return
+
+        if self.server.inject_faults(service):
+            self.send_json(503, {"message": "Service Unavailable"})
+        elif service == "restcountries":
+            self.restcountries(path[len(RESTCOUNTRIES_PATH):], query)
+        elif service == "open_meteo":
+            self.open_meteo(query)
+        elif service == "travel_advisory":
+            self.travel_advisory(query)
+        else:
+            self.nager_date(path[len(NAGER_DATE_PATH + "/PublicHolidays/"):])
+
+    def restcountries(self, path, query):
+        fields = query["fields"][0].split(",") if "fields" in query else None
+        kind, _, term = path.strip("/").partition("/")
+        term = term.casefold()
+        if kind == "all":
+            matches = COUNTRIES
+        elif kind == "name":
+            matches = [c for c in COUNTRIES
+                       if term in c["name"]["common"].casefold() or term in c["name"]["official"].casefold()]
+        elif kind == "capital":
+            matches = [c for c in COUNTRIES if any(term in capital.casefold() for capital in c["capital"])]
+        else:
+            matches = []
+        if not matches:
+            self.send_json(404, {"status": 404, "message": "Not Found"})
+        else:
+            self.send_json(200, [project(country, fields) for country in matches])
+
+    def open_meteo(self, query):
+        try:
+            latitudes = [float(value) for value in query["latitude"][0].split(",")]
+            longitudes = [float(value) for value in query["longitude"][0].split(",")]
+        except (KeyError, ValueError):
+            self.send_json(400, {"error": True, "reason": "Invalid coordinates"})
+            return
+        timezone = query.get("timezone", [None])[0]
+        results = [fake_weather(lat, lon, timezone) for lat, lon in zip(latitudes, longitudes)]
+        self.send_json(200, results if len(results) > 1 else results[0])
+
+    def travel_advisory(self, query):
+        codes = query["countrycode"][0].upper().split(",") if "countrycode" in query else None
+        data = {c["cca2"]: fake_advisory(c) for c in COUNTRIES if codes is None or c["cca2"] in codes}
+        self.send_json(200, {"api": {"status": {"code": 200}}, "status": "ok", "data": data})
+
+    def nager_date(self, path):
+        year, _, country_code = path.partition("/")
+        if not year.isdigit() or country_code.upper() not in NATIONAL_DAYS:
+            self.send_json(404, {"title": "Not Found", "status": 404})
+            return
+        self.send_json(200, fake_holidays(country_code.upper(), int(year)))
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# Server that delays and fails requests as configured, seeded so runs are repeatable
+class MockUpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, service_latency=None, seed=0):
+        super().__init__(address, MockUpstreamHandler)
+        self.latency = {service: latency for service in SERVICES}
+        self.latency.update(service_latency or {})
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_counts = {service: 0 for service in SERVICES}
+
+    # Sleep for the service's latency, returns True if this request should fail
+    def inject_faults(self, service):
+        with self.lock:
+            self.request_counts[service] += 1
+            delay = self.latency[service] + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+# Function to start the mock upstream in a background thread, returns (server, base_url)
+def start_mock_upstream(host="127.0.0.1", port=0, **options):
+    server = MockUpstreamServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.base_url
+
+# Function to parse "service=seconds" overrides for --service-latency
+def parse_service_latency(value):
+    service, _, seconds = value.partition("=")
+    if service not in SERVICES:
+        raise argparse.ArgumentTypeError(f"unknown service '{service}', pick one of {', '.join(SERVICES)}")
+    try:
+        return service, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{seconds}' is not a number of seconds")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Travel & Weather Advisor's upstream APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many random extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--service-latency", type=parse_service_latency, action="append", default=[],
+                        help="per-service latency override, e.g. travel_advisory=0.8 (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for jitter and injected errors")
+    args = parser.parse_args()
+
+    server = MockUpstreamServer((args.host, args.port), latency=args.latency, jitter=args.jitter,
+                                error_rate=args.error_rate, service_latency=dict(args.service_latency), seed=args.seed)
+    print(f"Mock upstream listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass